@@ -0,0 +1,150 @@
+from voter_schema import TABLE_NAME
+
+# (label, lowest age, highest age) of each age band; other ages fall in 'Unknown'
+AGE_BANDS = [
+    ('18-25', 18, 25),
+    ('26-35', 26, 35),
+    ('36-45', 36, 45),
+    ('46-55', 46, 55),
+    ('56-65', 56, 65),
+    ('65+', 66, None),
+]
+
+# Dimensions of the demographic rollup, coarsest first
+ROLLUP_DIMENSIONS = ['locality', 'polling_area', 'age_band', 'gender']
+
+
+def rollup_table_name(table_name):
+    """Name of the materialized demographic rollup of table_name"""
+    return f"{table_name}_demographics"
+
+
+def age_band_sql(column='age'):
+    """CASE expression mapping an age column to its AGE_BANDS label"""
+    cases = " ".join(
+        f"WHEN {column} >= {low} THEN '{label}'" if high is None else
+        f"WHEN {column} BETWEEN {low} AND {high} THEN '{label}'"
+        for label, low, high in AGE_BANDS
+    )
+    return f"CASE {cases} ELSE 'Unknown' END"
+
+
+def _rollup_select(table_name, where=""):
+    """Aggregation producing the rollup rows of table_name (optionally filtered)"""
+    return f"""
+        SELECT coalesce(CAST(locality AS VARCHAR), '') AS locality,
+               coalesce(CAST(polling_area AS VARCHAR), '') AS polling_area,
+               {age_band_sql()} AS age_band,
+               coalesce(CAST(gender AS VARCHAR), 'Unknown') AS gender,
+               COUNT(*) AS voters
+        FROM {table_name}
+        {where}
+        GROUP BY ALL
+    """
+
+
+def build_demographic_rollup(con, table_name=TABLE_NAME):
+    """
+    Materialize voter counts by locality x polling_area x age_band x gender
+
+    The rollup has at most a few thousand rows per locality, so every
+    demographic view below is answered from it instead of the voter table.
+    """
+    rollup = rollup_table_name(table_name)
+    con.execute(f"""
+        CREATE OR REPLACE TABLE {rollup} AS
+        {_rollup_select(table_name)}
+        ORDER BY locality, polling_area, age_band, gender
+    """)
+    count = con.execute(f"SELECT COUNT(*) FROM {rollup}").fetchone()[0]
+    print(f"Built demographic rollup '{rollup}' with {count} rows")
+    return count
+
+
+def refresh_demographic_rollup(con, localities, table_name=TABLE_NAME):
+    """
+    Recompute the rollup rows of the given localities only
+
+    Used after an incremental load that touched a few localities; falls back
+    to a full build when the rollup does not exist yet.
+    """
+    rollup = rollup_table_name(table_name)
+    exists = con.execute("SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [rollup]).fetchone()[0] > 0
+    if not exists:
+        return build_demographic_rollup(con, table_name)
+
+    localities = sorted({locality or '' for locality in localities})
+    con.execute(f"DELETE FROM {rollup} WHERE list_contains(?, locality)", [localities])
+    con.execute(f"""
+        INSERT INTO {rollup}
+        {_rollup_select(table_name, "WHERE list_contains($localities, coalesce(CAST(locality AS VARCHAR), ''))")}
+    """, {'localities': localities})
+    print(f"Refreshed demographic rollup '{rollup}' for {len(localities)} localities")
+    return len(localities)
+
+
+def _rollup_source(con, table_name):
+    """
+    FROM target of the demographic queries: the rollup, or the same
+    aggregation over the voter table when the database was never prepared
+    """
+    rollup = rollup_table_name(table_name)
+    exists = con.execute("SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [rollup]).fetchone()[0] > 0
+    return rollup if exists else f"({_rollup_select(table_name)})"
+
+
+def demographics(con, group_by=('age_band',), locality=None, polling_area=None, gender=None,
+                 table_name=TABLE_NAME):
+    """
+    Voter counts grouped by any of ROLLUP_DIMENSIONS, read from the rollup
+
+    Without the rollup table the voter table is aggregated directly (slower,
+    same result).
+
+    Parameters:
+    - con: DuckDB connection
+    - group_by: Dimensions to group by, e.g. ('age_band', 'gender')
+    - locality, polling_area, gender: Optional filters (exact values)
+    - table_name: Voter table the rollup was built from
+
+    Returns a DataFrame with the group columns, voters and percentage (of the filtered total)
+    """
+    group_by = [dim for dim in group_by if dim in ROLLUP_DIMENSIONS]
+    filters = {'locality': locality, 'polling_area': polling_area, 'gender': gender}
+    params = {name: value for name, value in filters.items() if value is not None}
+    where = " AND ".join(f"{name} = ${name}" for name in params)
+
+    group_list = ", ".join(group_by)
+    query = f"""
+        SELECT {group_list + ', ' if group_by else ''}
+               CAST(SUM(voters) AS BIGINT) AS voters,
+               ROUND(SUM(voters) * 100.0 / SUM(SUM(voters)) OVER (), 2) AS percentage
+        FROM {_rollup_source(con, table_name)}
+        {f"WHERE {where}" if where else ""}
+        {f"GROUP BY {group_list} ORDER BY {group_list}" if group_by else ""}
+    """
+    return con.execute(query, params).fetchdf()
+
+
+def age_distribution(con, locality=None, polling_area=None, table_name=TABLE_NAME):
+    """Voters per age band, optionally for one locality / polling area"""
+    return demographics(con, ['age_band'], locality, polling_area, table_name=table_name)
+
+
+def gender_by_age(con, locality=None, polling_area=None, table_name=TABLE_NAME):
+    """Voters per age band and gender, optionally for one locality / polling area"""
+    return demographics(con, ['age_band', 'gender'], locality, polling_area, table_name=table_name)
+
+
+def locality_breakdown(con, table_name=TABLE_NAME):
+    """Voters per locality and gender"""
+    return demographics(con, ['locality', 'gender'], table_name=table_name)
+
+
+def polling_areas(con, locality, table_name=TABLE_NAME):
+    """Polling areas of a locality present in the rollup (or the voter table without one)"""
+    rows = con.execute(
+        f"SELECT DISTINCT polling_area FROM {_rollup_source(con, table_name)} WHERE locality = ? ORDER BY 1",
+        [locality]
+    ).fetchall()
+    return [row[0] for row in rows]
@@ -0,0 +1,425 @@
+import argparse
+import functools
+import json
+import logging
+import os
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+from incremental_ingest import incremental_ingest
+from voter_schema import TABLE_NAME
+
+BENCH_ROWS = 10_000_000  # Rows generated by default (Delhi's roll is 10M-30M)
+BENCH_LOCALITIES = 300  # Number of localities in the synthetic roll
+BENCH_FILES = 16  # CSV files the synthetic roll is split into
+BENCH_SEED = 42  # Changing it generates a different (but equally deterministic) roll
+BENCH_REPEAT = 20  # Timed runs per workload
+BENCH_WARMUP = 2  # Untimed runs per workload before timing
+BENCH_DEEP_OFFSET = 100_000  # Rows before the page read by the deep-page workloads
+BENCH_PERCENTILES = [0.5, 0.95, 0.99]
+
+# Surnames in order of frequency; weights follow Zipf's law, so the first few
+# cover a large share of the roll like Kumar / Singh / Sharma do in Delhi
+COMMON_SURNAMES = [
+    'Kumar', 'Singh', 'Sharma', 'Gupta', 'Devi', 'Verma', 'Yadav', 'Jain', 'Aggarwal', 'Khan',
+    'Chauhan', 'Mishra', 'Pandey', 'Arora', 'Malhotra', 'Kapoor', 'Bansal', 'Goel', 'Mittal', 'Saxena',
+    'Srivastava', 'Tiwari', 'Chaudhary', 'Rawat', 'Negi', 'Bhatia', 'Sethi', 'Khanna', 'Chopra', 'Mehta',
+    'Ahmed', 'Ansari', 'Qureshi', 'Rana', 'Tyagi', 'Tomar', 'Bhardwaj', 'Dubey', 'Shukla', 'Tripathi',
+    'Paswan', 'Prasad', 'Thakur', 'Rathore', 'Solanki', 'Dhillon', 'Gill', 'Sandhu', 'Bhalla', 'Sood',
+]
+MALE_FIRST_NAMES = [
+    'Ram', 'Rahul', 'Amit', 'Suresh', 'Rajesh', 'Mohan', 'Sanjay', 'Vijay', 'Anil', 'Sunil',
+    'Ramesh', 'Deepak', 'Manoj', 'Ashok', 'Rakesh', 'Vikas', 'Mohammad', 'Arjun', 'Rohit', 'Pankaj',
+    'Gaurav', 'Naveen', 'Harish', 'Dinesh', 'Mukesh', 'Ravi', 'Ajay', 'Sachin', 'Nitin', 'Shyam',
+]
+FEMALE_FIRST_NAMES = [
+    'Sunita', 'Priya', 'Rekha', 'Geeta', 'Anita', 'Pooja', 'Neha', 'Kavita', 'Seema', 'Suman',
+    'Meena', 'Asha', 'Sita', 'Usha', 'Nisha', 'Rani', 'Kiran', 'Anjali', 'Shabnam', 'Poonam',
+    'Renu', 'Manju', 'Sapna', 'Jyoti', 'Radha', 'Savita', 'Rita', 'Kamla', 'Shanti', 'Lata',
+]
+AREAS = [
+    'Rohini', 'Dwarka', 'Saket', 'Karol Bagh', 'Lajpat Nagar', 'Janakpuri', 'Mayur Vihar', 'Shahdara',
+    'Narela', 'Najafgarh', 'Pitampura', 'Vasant Kunj', 'Laxmi Nagar', 'Okhla', 'Seelampur', 'Burari',
+    'Mehrauli', 'Uttam Nagar', 'Paschim Vihar', 'Sangam Vihar', 'Kalkaji', 'Chandni Chowk', 'Tilak Nagar',
+    'Patel Nagar', 'Model Town', 'Shalimar Bagh', 'Badarpur', 'Mustafabad', 'Bawana', 'Kirari',
+]
+SYLLABLES = ['bha', 'ch', 'dev', 'gar', 'har', 'jan', 'kal', 'lal', 'man', 'nar', 'pal', 'ra', 'sar', 'tan', 'vir', 'wal']
+SLOTS = 100_000  # Resolution of the weighted name pickers
+
+
+def weighted_slots(names, exponent=1.0):
+    """
+    DataFrame(slot, name) giving each name a share of SLOTS proportional to 1 / rank ** exponent
+
+    Every name gets at least one slot, so names in the tail stay rare but present.
+    """
+    weights = [1 / (rank + 1) ** exponent for rank in range(len(names))]
+    total = sum(weights)
+    counts = [max(1, int(SLOTS * weight / total)) for weight in weights]
+    slots = [name for name, count in zip(names, counts) for _ in range(count)]
+    return pd.DataFrame({'slot': range(len(slots)), 'name': slots})
+
+
+def synthetic_surnames(count=3000):
+    """COMMON_SURNAMES followed by count made-up rare surnames"""
+    rare = []
+    for i in range(count):
+        a, b, c = (SYLLABLES[(i * k) % len(SYLLABLES)] for k in (1, 7, 13))
+        rare.append(f"{a}{b}{c}{i % 97}".capitalize())
+    return COMMON_SURNAMES + rare
+
+
+def locality_names(count=BENCH_LOCALITIES):
+    """count locality names built from AREAS ('Rohini', 'Rohini Sector 2', ...)"""
+    names = []
+    for i in range(count):
+        area, sector = AREAS[i % len(AREAS)], i // len(AREAS)
+        names.append(area if sector == 0 else f"{area} Sector {sector + 1}")
+    return names
+
+
+def generate_voter_csvs(output_dir, rows=BENCH_ROWS, localities=BENCH_LOCALITIES, files=BENCH_FILES, seed=BENCH_SEED):
+    """
+    Write a synthetic voter roll as files CSVs in the declared voter layout
+
+    Values are derived from hashes of the row number, so the same arguments
+    always produce the same files (on any thread count), which keeps timings
+    comparable across commits. Surnames, first names and locality sizes are
+    Zipf-skewed; a few thousand rare surnames form the long tail.
+
+    Parameters:
+    - output_dir: Folder for the CSV files (created if missing)
+    - rows: Total number of voters
+    - localities: Number of localities
+    - files: Number of CSV files
+    - seed: Salt of the row hashes
+
+    Returns the list of CSV paths
+    """
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect()
+    pickers = {
+        'surnames': weighted_slots(synthetic_surnames()),
+        'male_names': weighted_slots(MALE_FIRST_NAMES, 0.8),
+        'female_names': weighted_slots(FEMALE_FIRST_NAMES, 0.8),
+        'localities': weighted_slots(locality_names(localities), 0.5),
+    }
+    for name, slots in pickers.items():
+        con.register(f"{name}_df", slots)
+        con.execute(f"CREATE TABLE {name} AS SELECT * FROM {name}_df")
+
+    def pick(table, salt):
+        return f"(SELECT name FROM {table} WHERE slot = hash(i, {seed}, '{salt}') % {len(pickers[table])})"
+
+    def unit(salt):
+        return f"((hash(i, {seed}, '{salt}') % 1000000) / 1000000.0)"
+
+    paths = []
+    per_file = -(-rows // files)
+    for index in range(files):
+        start, end = index * per_file, min(rows, (index + 1) * per_file)
+        path = Path(output_dir) / f"voters_{index:03d}.csv"
+        con.execute(f"""
+            COPY (
+                WITH people AS (
+                    SELECT i,
+                           {pick('localities', 'locality')} AS locality,
+                           1 + CAST(hash(i, {seed}, 'house') % 400 AS INTEGER) AS house,
+                           CASE WHEN {unit('gender')} < 0.52 THEN 'M' ELSE 'F' END AS gender,
+                           {pick('surnames', 'surname')} AS last_name,
+                           18 + CAST(pow({unit('age')}, 1.4) * 77 AS INTEGER) AS age
+                    FROM range({start}, {end}) t(i)
+                )
+                SELECT locality,
+                       'Polling Area ' || (1 + house // 50) AS polling_area,
+                       CASE WHEN hash(i, {seed}, 'suffix') % 10 = 0 THEN house || '-A' ELSE CAST(house AS VARCHAR) END AS house_number,
+                       CASE WHEN gender = 'M' THEN {pick('male_names', 'first')} ELSE {pick('female_names', 'first')} END AS first_name,
+                       last_name,
+                       CASE WHEN gender = 'F' AND age > 24 AND {unit('married')} < 0.7 THEN 'Husband' ELSE 'Father' END AS relation,
+                       {pick('male_names', 'relation')} AS relation_first_name,
+                       last_name AS relation_last_name,
+                       gender,
+                       age
+                FROM people
+                ORDER BY i
+            ) TO '{path}' (HEADER, DELIMITER ',')
+        """)
+        paths.append(str(path))
+        print(f"Wrote {end - start} rows to {path}")
+    con.close()
+    return paths
+
+
+def percentiles(timings):
+    """p50/p95/p99 of a list of timings in seconds, in milliseconds"""
+    quantiles = pd.Series(timings).quantile(BENCH_PERCENTILES)
+    return {f"p{int(q * 100)}_ms": round(value * 1000, 2) for q, value in quantiles.items()}
+
+
+def time_workload(run, repeat=BENCH_REPEAT, warmup=BENCH_WARMUP):
+    """
+    Run a workload warmup + repeat times, returning (timings, rows of the last run)
+
+    A workload with a prepare attribute has it called once first, untimed.
+    """
+    if hasattr(run, 'prepare'):
+        run.prepare()
+    for _ in range(warmup):
+        run()
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - started)
+    return timings, result
+
+
+def result_rows(result):
+    """Row count of a workload result (DataFrame, (DataFrame, total) or None)"""
+    if isinstance(result, tuple):
+        return int(result[1])
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    return 0
+
+
+def pick_search_terms(con, table_name=TABLE_NAME):
+    """Common and rare surnames, a mid-sized locality and one of its houses from the loaded roll"""
+    surnames = con.execute(f"""
+        SELECT last_name, COUNT(*) AS n FROM {table_name}
+        GROUP BY last_name ORDER BY n DESC, last_name
+    """).fetchall()
+    localities = con.execute(f"""
+        SELECT CAST(locality AS VARCHAR), COUNT(*) AS n FROM {table_name}
+        GROUP BY ALL ORDER BY n DESC, 1
+    """).fetchall()
+    locality = localities[len(localities) // 2][0]
+    house_number = con.execute(
+        f"SELECT house_number FROM {table_name} WHERE locality = ? LIMIT 1", [locality]
+    ).fetchone()[0]
+    return {
+        'common_surname': surnames[0][0],
+        'rare_surname': surnames[-1][0],
+        'first_name': MALE_FIRST_NAMES[0],
+        'misspelt_surname': COMMON_SURNAMES[2].replace('h', ''),
+        'locality': locality,
+        'house_number': house_number,
+    }
+
+
+def keyset_page(search, offset, **criteria):
+    """
+    Workload reading the page after the first offset matches with a keyset seek
+
+    This is how the app pages: the next page seeks past the last key of the
+    current one, with the total kept from the first page. The key at offset
+    is looked up once, untimed, in prepare.
+    """
+    state = {}
+
+    def prepare():
+        _, state['total'], _, state['key'] = search(limit=offset, **criteria)
+
+    def run():
+        return search(seek=('after', state['key']), total_count=state['total'], **criteria)
+
+    run.prepare = prepare
+    return run
+
+
+def search_shapes(terms):
+    """Search criteria of the app's common search shapes, by workload name"""
+    common, rare = terms['common_surname'], terms['rare_surname']
+    return {
+        'common_surname_prefix': dict(last_name=common, match_mode='prefix'),
+        'common_surname_contains': dict(last_name=common[1:-1], match_mode='contains'),
+        'common_full_name': dict(first_name=terms['first_name'], last_name=common, match_mode='prefix'),
+        'rare_surname_prefix': dict(last_name=rare, match_mode='prefix'),
+        'rare_surname_contains': dict(last_name=rare[1:-1], match_mode='contains'),
+        'sounds_like': dict(last_name=terms['misspelt_surname'], match_mode='phonetic'),
+        'locality_only': dict(locality=terms['locality']),
+        'locality_and_surname': dict(last_name=common, locality=terms['locality'], match_mode='prefix'),
+        'house_number': dict(locality=terms['locality'], house_number=terms['house_number']),
+    }
+
+
+def search_workloads(app, conn, terms):
+    """
+    Named search calls covering the app's common search shapes
+
+    search/... workloads run search_persons_keyset the way the app does: the
+    first page with its window count, deep pages with a keyset seek and the
+    known total. search/legacy_offset/... run the same searches through the
+    COUNT + OFFSET path of search_persons_paginated, which the app no longer
+    uses, for comparison.
+    """
+    keyset = functools.partial(app.search_persons_keyset, conn)
+    offset = functools.partial(app.search_persons_paginated, conn)
+    common = terms['common_surname']
+    workloads = {}
+    for name, criteria in search_shapes(terms).items():
+        workloads[f'search/{name}'] = functools.partial(keyset, **criteria)
+    workloads['search/deep_page_common'] = keyset_page(keyset, BENCH_DEEP_OFFSET, last_name=common, match_mode='prefix')
+    workloads['search/deep_page_locality'] = keyset_page(keyset, BENCH_DEEP_OFFSET // 10, locality=terms['locality'])
+
+    for name, criteria in search_shapes(terms).items():
+        workloads[f'search/legacy_offset/{name}'] = functools.partial(offset, **criteria)
+    workloads['search/legacy_offset/deep_page_common'] = functools.partial(
+        offset, last_name=common, match_mode='prefix', offset=BENCH_DEEP_OFFSET)
+    workloads['search/legacy_offset/deep_page_locality'] = functools.partial(
+        offset, locality=terms['locality'], offset=BENCH_DEEP_OFFSET // 10)
+    return workloads
+
+
+def query_function_workloads(queries, terms):
+    """Named Query_function.py calls"""
+    import Query_function
+
+    return {
+        'query_function/query_by_locality': lambda: Query_function.query_by_locality(queries, terms['locality']),
+        'query_function/age_distribution': lambda: Query_function.get_age_distribution(queries),
+        'query_function/age_distribution_locality': lambda: Query_function.get_age_distribution(queries, terms['locality']),
+        'query_function/search_person_common': lambda: Query_function.search_person(
+            queries, first_name=terms['first_name'], last_name=terms['common_surname']),
+        'query_function/search_person_rare': lambda: Query_function.search_person(queries, last_name=terms['rare_surname']),
+        'query_function/get_household': lambda: Query_function.get_household(
+            queries, terms['locality'], terms['house_number']),
+    }
+
+
+def load_search_app(database_path):
+    """Import the search app without a Streamlit server, pointed at database_path"""
+    # Silence the bare-mode warnings of the Streamlit calls made at import
+    logging.disable(logging.WARNING)
+    try:
+        import voter_search_new_app as app
+    finally:
+        logging.disable(logging.NOTSET)
+
+    app.DUCKDB_PATH = database_path
+    # Background EXPLAIN ANALYZE runs would compete with the timed searches (and write a log)
+    app.QUERY_LOG_PATH = None
+    return app
+
+
+def current_commit():
+    """Short hash of the checked-out commit (with '-dirty' for local changes), or None outside git"""
+    repo = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repo,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(database_path, repeat=BENCH_REPEAT, warmup=BENCH_WARMUP, only=None):
+    """
+    Time every workload against a loaded voter database
+
+    Parameters:
+    - database_path: DuckDB file loaded with the synthetic roll
+    - repeat: Timed runs per workload
+    - warmup: Untimed runs per workload
+    - only: Substring selecting a subset of workloads
+
+    Returns the report dict (environment, search terms and per-workload percentiles)
+    """
+    from Query_function import open_queries
+
+    app = load_search_app(database_path)
+    queries = open_queries(database_path)
+    conn = queries.conn
+    terms = pick_search_terms(conn)
+    rows = conn.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}").fetchone()[0]
+
+    workloads = {**search_workloads(app, conn, terms), **query_function_workloads(queries, terms)}
+    results = {}
+    for name, run in workloads.items():
+        if only and only not in name:
+            continue
+        timings, result = time_workload(run, repeat, warmup)
+        results[name] = {'rows': result_rows(result), **percentiles(timings)}
+        print(f"{name:45} {results[name]['p50_ms']:>10.2f} {results[name]['p95_ms']:>10.2f} "
+              f"{results[name]['p99_ms']:>10.2f}  ({results[name]['rows']} rows)")
+    conn.close()
+
+    return {
+        'commit': current_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'duckdb_version': duckdb.__version__,
+        'cpus': os.cpu_count(),
+        'table_rows': rows,
+        'repeat': repeat,
+        'terms': terms,
+        'workloads': results,
+    }
+
+
+def compare_reports(baseline, report):
+    """Print the p50/p95/p99 change of each workload against a baseline report"""
+    print(f"\nChange against {baseline.get('commit')} ({baseline.get('table_rows')} rows):")
+    for name, current in report['workloads'].items():
+        before = baseline.get('workloads', {}).get(name)
+        if before is None:
+            print(f"{name:45} (new)")
+            continue
+        changes = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            change = (current[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            changes.append(f"{key[:3]} {change:+7.1f}%")
+        print(f"{name:45} {'  '.join(changes)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark voter searches on a synthetic Delhi-scale roll")
+    parser.add_argument("--rows", type=int, default=BENCH_ROWS, help="Voters to generate")
+    parser.add_argument("--localities", type=int, default=BENCH_LOCALITIES, help="Localities to generate")
+    parser.add_argument("--files", type=int, default=BENCH_FILES, help="CSV files to split the roll into")
+    parser.add_argument("--seed", type=int, default=BENCH_SEED, help="Seed of the generated roll")
+    parser.add_argument("--data-dir", default="bench_data", help="Folder for the generated CSV files")
+    parser.add_argument("--database", default="bench_voter_data.duckdb", help="DuckDB file to load and query")
+    parser.add_argument("--regenerate", action="store_true", help="Regenerate and reload even if the database exists")
+    parser.add_argument("--repeat", type=int, default=BENCH_REPEAT, help="Timed runs per workload")
+    parser.add_argument("--warmup", type=int, default=BENCH_WARMUP, help="Untimed runs per workload")
+    parser.add_argument("--only", help="Only run workloads whose name contains this")
+    parser.add_argument("--output", help="JSON report path (default: bench_results/<commit>.json)")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    if args.regenerate or not os.path.exists(args.database):
+        for stale in [args.database] + [str(path) for path in Path(args.data_dir).glob('*.csv')]:
+            if os.path.exists(stale):
+                os.remove(stale)
+        generate_voter_csvs(args.data_dir, args.rows, args.localities, args.files, args.seed)
+        started = time.perf_counter()
+        con = incremental_ingest(args.data_dir, args.database, strict=True)
+        if con is None:
+            raise SystemExit("Loading the synthetic roll failed")
+        con.close()
+        print(f"Loaded and prepared in {time.perf_counter() - started:.1f} s")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print(f"\n{'workload':45} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    report = run_benchmark(args.database, args.repeat, args.warmup, args.only)
+
+    output = args.output or os.path.join("bench_results", f"{report['commit'] or 'report'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\nReport written to {output}")
+
+    if baseline is not None:
+        compare_reports(baseline, report)
@@ -0,0 +1,88 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import duckdb
+
+# Default number of cursors handed out concurrently
+DEFAULT_POOL_SIZE = int(os.environ.get("VOTER_DB_POOL_SIZE", "4"))
+
+
+class ConnectionPool:
+    """
+    Bounded pool of DuckDB cursors over one database
+
+    Each cursor is an independent connection to the same database instance,
+    so concurrent Streamlit sessions run their queries in parallel instead of
+    sharing (and serializing on) a single connection. Callers wait when every
+    cursor is in use; wait times are recorded for the stats line.
+    """
+
+    def __init__(self, database_path, size=DEFAULT_POOL_SIZE, read_only=True):
+        self.database_path = database_path
+        self.size = max(1, size)
+        self.read_only = read_only
+        self._base = duckdb.connect(database_path, read_only=read_only)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+        self.acquisitions = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.in_use = 0
+
+    def _get_cursor(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return self._base.cursor()
+        return self._idle.get(timeout=timeout)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Borrow a cursor for the duration of a with-block
+
+        Raises queue.Empty if no cursor frees up within timeout seconds.
+        """
+        start = time.perf_counter()
+        cursor = self._get_cursor(timeout)
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.acquisitions += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self.in_use += 1
+        try:
+            yield cursor
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._idle.put(cursor)
+
+    def stats(self):
+        """Pool usage and wait-time metrics"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'in_use': self.in_use,
+                'acquisitions': self.acquisitions,
+                'avg_wait_ms': (self.total_wait / self.acquisitions * 1000) if self.acquisitions else 0.0,
+                'max_wait_ms': self.max_wait * 1000,
+            }
+
+    def close(self):
+        """Close every cursor and the underlying connection"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._base.close()
@@ -3,6 +3,9 @@ import pandas as pd
 import os
 from pathlib import Path
 
+from voter_ingest import prepare_voter_table
+from voter_schema import TABLE_NAME, check_header, create_voter_types, rejects_table_name, save_rejects, strict_csv_sql
+
 def create_sample_csv():
     """Create a sample CSV file for demonstration"""
     sample_data = {
@@ -19,7 +22,7 @@ def create_sample_csv():
     print(f"Created sample CSV file: {csv_path}")
     return csv_path
 
-def read_csv_to_duckdb(csv_file_path, table_name='my_table', database_path=':memory:'):
+def read_csv_to_duckdb(csv_file_path, table_name='my_table', database_path=':memory:', voter_table=False):
     """
     Read a CSV file and load it into DuckDB database
     
@@ -27,6 +30,7 @@ def read_csv_to_duckdb(csv_file_path, table_name='my_table', database_path=':mem
     - csv_file_path: Path to the CSV file
     - table_name: Name for the table in DuckDB
     - database_path: Path to DuckDB database file (use ':memory:' for in-memory)
+    - voter_table: Build the voter search structures (name index) after loading
     """
     
     try:
@@ -47,6 +51,9 @@ def read_csv_to_duckdb(csv_file_path, table_name='my_table', database_path=':mem
         result = con.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()
         print(f"Successfully loaded {result[0]} rows into table '{table_name}'")
         
+        if voter_table:
+            prepare_voter_table(con, table_name)
+        
         # Show the first few rows
         print("\nFirst 5 rows of the data:")
         result = con.execute(f"SELECT * FROM {table_name} LIMIT 5").fetchdf()
@@ -122,6 +129,98 @@ def read_multiple_csv_files(folder_path, table_prefix='data'):
         print(f"Error reading multiple CSV files: {e}")
         return None
 
+def read_csv_folder(folder_path, table_name='Delhi_Voter', database_path=':memory:', voter_table=False):
+    """
+    Read every CSV file in a folder into one table with a single multi-file scan
+    
+    DuckDB reads the files in parallel. Each row records the file it came
+    from in a source_file column, and per-file row counts are reported from
+    the loaded table instead of a separate count query per file.
+    
+    Parameters:
+    - folder_path: Folder containing the CSV files (e.g. one per assembly constituency)
+    - table_name: Name for the unified table in DuckDB
+    - database_path: Path to DuckDB database file (use ':memory:' for in-memory)
+    - voter_table: Build the voter search structures after loading
+    """
+    try:
+        con = duckdb.connect(database_path)
+        csv_files = sorted(Path(folder_path).glob('*.csv'))
+        
+        if not csv_files:
+            print(f"No CSV files found in {folder_path}")
+            return con
+        
+        file_list = ", ".join(f"'{csv_file.resolve()}'" for csv_file in csv_files)
+        print(f"Loading {len(csv_files)} CSV files from {folder_path} into table {table_name}")
+        
+        con.execute(f"""
+            CREATE OR REPLACE TABLE {table_name} AS 
+            SELECT * EXCLUDE (filename), filename AS source_file
+            FROM read_csv_auto([{file_list}], filename=true, union_by_name=true)
+        """)
+        
+        counts = con.execute(f"""
+            SELECT source_file, COUNT(*) FROM {table_name}
+            GROUP BY source_file ORDER BY source_file
+        """).fetchall()
+        for source_file, count in counts:
+            print(f"  - {Path(source_file).name}: {count} rows")
+        print(f"Successfully loaded {sum(count for _, count in counts)} rows into table '{table_name}'")
+        
+        if voter_table:
+            prepare_voter_table(con, table_name)
+        
+        return con
+        
+    except Exception as e:
+        print(f"Error reading CSV folder: {e}")
+        return None
+
+def load_voter_csv_strict(csv_files, database_path=':memory:', table_name=TABLE_NAME, voter_table=True):
+    """
+    Load voter roll CSV files using the declared schema
+    
+    Skips type sniffing entirely, so columns always land in the declared
+    compact types (ENUM gender/relation, UTINYINT age). Malformed rows are
+    written to the {table_name}_rejects side table instead of being
+    silently dropped.
+    
+    Parameters:
+    - csv_files: CSV file path, or list of paths, following VOTER_COLUMNS
+    - database_path: Path to DuckDB database file (use ':memory:' for in-memory)
+    - table_name: Name for the voter table
+    - voter_table: Build the voter search structures after loading
+    """
+    if isinstance(csv_files, (str, Path)):
+        csv_files = [csv_files]
+    csv_files = [str(Path(csv_file).resolve()) for csv_file in csv_files]
+    
+    try:
+        for csv_file in csv_files:
+            check_header(csv_file)
+        
+        con = duckdb.connect(database_path)
+        create_voter_types(con)
+        
+        print(f"Loading {len(csv_files)} CSV file(s) into table {table_name} with the declared schema")
+        con.execute(f"CREATE OR REPLACE TABLE {table_name} AS {strict_csv_sql(csv_files)}")
+        
+        count = con.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+        rejected = save_rejects(con, table_name)
+        print(f"Successfully loaded {count} rows into table '{table_name}'")
+        if rejected:
+            print(f"Rejected {rejected} rows, see table '{rejects_table_name(table_name)}'")
+        
+        if voter_table:
+            prepare_voter_table(con, table_name)
+        
+        return con
+    
+    except Exception as e:
+        print(f"Error loading voter CSV: {e}")
+        return None
+
 def query_examples(con, table_name='my_table'):
     """
     Demonstrate various queries on the loaded data
@@ -200,6 +299,15 @@ def main():
         print(f"\nAll tables in database: {list(result['name'])}")
         con3.close()
     
+    # Method 4: Read all CSV files in a folder into one table
+    print("\n" + "="*50)
+    print("METHOD 4: Reading a Folder into One Table")
+    print("="*50)
+    con4 = read_csv_folder('.', 'all_files')
+    
+    if con4:
+        con4.close()
+    
     print("\n" + "="*50)
     print("Demo completed!")
     print("="*50)
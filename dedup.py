@@ -0,0 +1,260 @@
+import argparse
+import os
+
+import duckdb
+import pandas as pd
+
+from name_normalize import house_number_sql
+from phonetic import term_keys
+from schema_catalog import ROW_ID_COLUMN
+from voter_schema import TABLE_NAME
+
+DEDUP_AGE_BAND = 5  # Years per age band; voters at most this many years apart are compared
+DEDUP_MAX_BLOCK = 500  # Larger blocks are skipped (and reported) instead of compared pairwise
+DEDUP_THRESHOLD = 0.92  # Minimum pair score for two rows to be treated as the same voter
+DEDUP_BATCHES = 16  # Blocks are scored in this many batches to bound memory
+
+# Weights of the pair score; they sum to 1
+SCORE_WEIGHTS = {
+    'first_name': 0.3,
+    'last_name': 0.3,
+    'relation_name': 0.3,
+    'age': 0.1,
+}
+
+
+def duplicates_table_name(table_name):
+    """Name of the table mapping rows to their duplicate cluster"""
+    return f"{table_name}_duplicates"
+
+
+def duplicate_pairs_table_name(table_name):
+    """Name of the table of scored candidate pairs"""
+    return f"{table_name}_duplicate_pairs"
+
+
+def drop_duplicate_tables(con, table_name=TABLE_NAME):
+    """Drop the dedup results, which refer to row ids of an earlier load"""
+    con.execute(f"DROP TABLE IF EXISTS {duplicates_table_name(table_name)}")
+    con.execute(f"DROP TABLE IF EXISTS {duplicate_pairs_table_name(table_name)}")
+
+
+def remove_duplicate_rows(con, deleted_rows, table_name=TABLE_NAME):
+    """
+    Forget rows deleted by an incremental load in the dedup results
+
+    deleted_rows is a table with a row_id column. Pairs touching those rows
+    are dropped and the remaining pairs re-clustered; rows added by the load
+    are only compared once find_duplicates runs again.
+    """
+    pairs = duplicate_pairs_table_name(table_name)
+    exists = con.execute("SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [pairs]).fetchone()[0] > 0
+    if not exists:
+        con.execute(f"DROP TABLE IF EXISTS {duplicates_table_name(table_name)}")
+        return 0
+    con.execute(f"""
+        DELETE FROM {pairs}
+        WHERE row_id_a IN (SELECT row_id FROM {deleted_rows}) OR row_id_b IN (SELECT row_id FROM {deleted_rows})
+    """)
+    return cluster_pairs(con, table_name)
+
+
+def build_blocks(con, table_name=TABLE_NAME, batches=DEDUP_BATCHES, max_block=DEDUP_MAX_BLOCK):
+    """
+    Assign every row a blocking key in the temporary table dedup_blocks
+
+    The key is the phonetic key of the full name (see phonetic.py), the
+    gender and an age band, so 'Ramesh Sharma' and 'Ramesh Sarma' of a
+    similar age land in the same block. Bands overlap: every row is placed
+    in the block of its own band (home = true) and of the band below, so
+    two rows at most DEDUP_AGE_BAND years apart always share the block of
+    the lower one's band, even across a band boundary (ages 29 and 30).
+    score_pairs only pairs rows where one of them is home, so each pair is
+    scored once. Keys are computed once per distinct name. Blocks larger
+    than max_block are dropped.
+
+    Returns (rows blocked, blocks skipped for size)
+    """
+    names = con.execute(f"""
+        SELECT DISTINCT first_name_norm, last_name_norm FROM {table_name}
+        WHERE first_name_norm <> '' AND last_name_norm <> ''
+    """).fetchdf()
+    names['name_key'] = [
+        ' '.join(term_keys(first)) + '|' + ' '.join(term_keys(last))
+        for first, last in zip(names['first_name_norm'], names['last_name_norm'])
+    ]
+
+    con.register('dedup_name_keys', names)
+    try:
+        con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE dedup_blocks AS
+            WITH keyed AS (
+                SELECT v.{ROW_ID_COLUMN} AS row_id,
+                       k.name_key || '|' || coalesce(CAST(v.gender AS VARCHAR), '') AS name_block,
+                       CAST(v.age AS INTEGER) // {DEDUP_AGE_BAND} AS band,
+                       v.first_name_norm, v.last_name_norm,
+                       trim(coalesce(v.relation_first_name_norm, '') || ' ' || coalesce(v.relation_last_name_norm, '')) AS relation_name,
+                       CAST(v.age AS INTEGER) AS age,
+                       coalesce(CAST(v.locality AS VARCHAR), '') AS locality,
+                       {house_number_sql('v.house_number')} AS house_key
+                FROM {table_name} v
+                JOIN dedup_name_keys k USING (first_name_norm, last_name_norm)
+                WHERE v.age IS NOT NULL
+            ),
+            banded AS (
+                SELECT name_block || '|' || CAST(band AS VARCHAR) AS block, true AS home, * EXCLUDE (name_block, band)
+                FROM keyed
+                UNION ALL
+                SELECT name_block || '|' || CAST(band - 1 AS VARCHAR) AS block, false AS home, * EXCLUDE (name_block, band)
+                FROM keyed
+            )
+            SELECT *, hash(block) % {batches} AS batch,
+                   COUNT(*) OVER (PARTITION BY block) AS block_size
+            FROM banded
+        """)
+    finally:
+        con.unregister('dedup_name_keys')
+
+    skipped = con.execute(
+        f"SELECT COUNT(DISTINCT block) FROM dedup_blocks WHERE block_size > {max_block}"
+    ).fetchone()[0]
+    con.execute(f"DELETE FROM dedup_blocks WHERE block_size > {max_block} OR block_size = 1")
+    rows = con.execute("SELECT COUNT(DISTINCT row_id) FROM dedup_blocks").fetchone()[0]
+    return rows, skipped
+
+
+def score_sql():
+    """Vectorized pair score of two dedup_blocks rows a and b, between 0 and 1"""
+    return f"""(
+        {SCORE_WEIGHTS['first_name']} * jaro_winkler_similarity(a.first_name_norm, b.first_name_norm)
+        + {SCORE_WEIGHTS['last_name']} * jaro_winkler_similarity(a.last_name_norm, b.last_name_norm)
+        + {SCORE_WEIGHTS['relation_name']} * jaro_winkler_similarity(a.relation_name, b.relation_name)
+        + {SCORE_WEIGHTS['age']} * (1 - least(abs(a.age - b.age), {DEDUP_AGE_BAND}) / {DEDUP_AGE_BAND})
+    )"""
+
+
+def score_pairs(con, table_name=TABLE_NAME, batches=DEDUP_BATCHES, threshold=DEDUP_THRESHOLD):
+    """
+    Score every pair of rows sharing a block, one batch of blocks at a time
+
+    Each batch is a single self-join that DuckDB runs vectorized on all
+    threads. Pairs scoring at least threshold are kept in the pairs table.
+
+    Returns the number of pairs kept
+    """
+    pairs = duplicate_pairs_table_name(table_name)
+    con.execute(f"""
+        CREATE OR REPLACE TABLE {pairs} (
+            row_id_a BIGINT, row_id_b BIGINT, score DOUBLE, same_household BOOLEAN
+        )
+    """)
+    for batch in range(batches):
+        con.execute(f"""
+            INSERT INTO {pairs}
+            SELECT row_id_a, row_id_b, score, same_household FROM (
+                SELECT a.row_id AS row_id_a, b.row_id AS row_id_b, {score_sql()} AS score,
+                       a.locality = b.locality AND a.house_key = b.house_key AS same_household
+                FROM dedup_blocks a
+                JOIN dedup_blocks b ON a.block = b.block AND a.row_id < b.row_id
+                    AND (a.home OR b.home) AND abs(a.age - b.age) <= {DEDUP_AGE_BAND}
+                WHERE a.batch = $batch AND b.batch = $batch
+            )
+            WHERE score >= $threshold
+        """, {'batch': batch, 'threshold': threshold})
+    return con.execute(f"SELECT COUNT(*) FROM {pairs}").fetchone()[0]
+
+
+def cluster_pairs(con, table_name=TABLE_NAME):
+    """
+    Group the scored pairs into clusters (connected components)
+
+    Writes {table_name}_duplicates(cluster_id, row_id, cluster_size, best_score),
+    where cluster_id is the smallest row id of the cluster.
+
+    Returns the number of clusters
+    """
+    pairs = con.execute(
+        f"SELECT row_id_a, row_id_b, score FROM {duplicate_pairs_table_name(table_name)}"
+    ).fetchall()
+
+    parent = {}
+
+    def find(row_id):
+        root = row_id
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while parent.get(row_id, row_id) != root:
+            parent[row_id], row_id = root, parent[row_id]
+        return root
+
+    best = {}
+    for row_a, row_b, score in pairs:
+        root_a, root_b = find(row_a), find(row_b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+        best[row_a] = max(best.get(row_a, 0.0), score)
+        best[row_b] = max(best.get(row_b, 0.0), score)
+
+    members = pd.DataFrame(
+        [(find(row_id), row_id, score) for row_id, score in best.items()],
+        columns=['cluster_id', 'row_id', 'best_score']
+    )
+    con.register('dedup_members', members)
+    try:
+        con.execute(f"""
+            CREATE OR REPLACE TABLE {duplicates_table_name(table_name)} AS
+            SELECT CAST(cluster_id AS BIGINT) AS cluster_id, CAST(row_id AS BIGINT) AS row_id,
+                   COUNT(*) OVER (PARTITION BY cluster_id) AS cluster_size,
+                   round(best_score, 3) AS best_score
+            FROM dedup_members
+            ORDER BY cluster_id, row_id
+        """)
+    finally:
+        con.unregister('dedup_members')
+    return members['cluster_id'].nunique() if len(members) else 0
+
+
+def find_duplicates(con, table_name=TABLE_NAME, threshold=DEDUP_THRESHOLD, batches=DEDUP_BATCHES,
+                    max_block=DEDUP_MAX_BLOCK, threads=None):
+    """
+    Run the whole deduplication job on a prepared voter table
+
+    Parameters:
+    - con: Read-write DuckDB connection
+    - table_name: Voter table prepared by voter_ingest.prepare_voter_table
+    - threshold: Minimum pair score (0-1) to link two rows
+    - batches: Number of block batches scored one after another
+    - max_block: Largest block compared pairwise
+    - threads: DuckDB worker threads (default: all cores)
+
+    Returns the number of duplicate clusters
+    """
+    con.execute(f"SET threads TO {threads or os.cpu_count() or 1}")
+
+    rows, skipped = build_blocks(con, table_name, batches, max_block)
+    print(f"Blocked {rows} rows with possible duplicates"
+          + (f"; skipped {skipped} blocks larger than {max_block} rows" if skipped else ""))
+
+    pair_count = score_pairs(con, table_name, batches, threshold)
+    print(f"Kept {pair_count} pairs scoring at least {threshold}")
+
+    clusters = cluster_pairs(con, table_name)
+    con.execute("DROP TABLE IF EXISTS dedup_blocks")
+    print(f"Wrote {clusters} duplicate clusters to '{duplicates_table_name(table_name)}'")
+    return clusters
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find duplicate and near-duplicate voter records")
+    parser.add_argument("database", nargs="?", default="voter_data.duckdb", help="DuckDB database file")
+    parser.add_argument("--table", default=TABLE_NAME, help="Voter table to deduplicate")
+    parser.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD, help="Minimum pair score (0-1)")
+    parser.add_argument("--batches", type=int, default=DEDUP_BATCHES, help="Number of block batches")
+    parser.add_argument("--max-block", type=int, default=DEDUP_MAX_BLOCK, help="Largest block compared pairwise")
+    parser.add_argument("--threads", type=int, help="DuckDB worker threads (default: all cores)")
+    args = parser.parse_args()
+
+    con = duckdb.connect(args.database)
+    find_duplicates(con, args.table, args.threshold, args.batches, args.max_block, args.threads)
+    con.execute("CHECKPOINT")
+    con.close()
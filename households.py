@@ -0,0 +1,77 @@
+from name_normalize import house_number_sql
+from schema_catalog import ROW_ID_COLUMN
+
+
+def household_table_name(table_name):
+    """Name of the table holding one row per (locality, house)"""
+    return f"{table_name}_households"
+
+
+def _household_select(table_name, locality, where=""):
+    """SELECT of the household rows of table_name (optionally restricted by a WHERE on locality)"""
+    return f"""
+        SELECT locality, house_key,
+               mode(house_number) AS house_number,
+               COUNT(*) AS members,
+               list({ROW_ID_COLUMN} ORDER BY {ROW_ID_COLUMN}) AS row_ids
+        FROM (
+            SELECT {locality} AS locality,
+                   {house_number_sql('house_number')} AS house_key,
+                   CAST(house_number AS VARCHAR) AS house_number,
+                   {ROW_ID_COLUMN}
+            FROM {table_name}
+        )
+        WHERE house_key <> '' {f"AND {where}" if where else ""}
+        GROUP BY locality, house_key
+    """
+
+
+def build_household_table(con, table_name='Delhi_Voter'):
+    """
+    Build the household table of table_name
+
+    One row per (locality, normalized house number) with the most common
+    spelling of the house number, the member count and the members' row ids.
+    Rows are sorted by the key and an ART index is created on it, so looking
+    up a household reads a single row.
+    """
+    columns = [row[0] for row in con.execute(f"DESCRIBE {table_name}").fetchall()]
+    households = household_table_name(table_name)
+
+    if 'house_number' not in columns or ROW_ID_COLUMN not in columns:
+        print(f"No house_number/{ROW_ID_COLUMN} columns in '{table_name}', skipping household table")
+        return 0
+
+    locality = "coalesce(CAST(locality AS VARCHAR), '')" if 'locality' in columns else "''"
+    con.execute(f"""
+        CREATE OR REPLACE TABLE {households} AS
+        {_household_select(table_name, locality)}
+        ORDER BY locality, house_key
+    """)
+    con.execute(f"CREATE INDEX {households}_key ON {households} (locality, house_key)")
+
+    count = con.execute(f"SELECT COUNT(*) FROM {households}").fetchone()[0]
+    print(f"Built household table '{households}' with {count} households")
+    return count
+
+
+def refresh_households(con, localities, table_name='Delhi_Voter'):
+    """
+    Recompute the households of the given localities only
+
+    Used after an incremental load; falls back to a full build when the
+    household table does not exist yet.
+    """
+    households = household_table_name(table_name)
+    exists = con.execute("SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [households]).fetchone()[0] > 0
+    if not exists:
+        return build_household_table(con, table_name)
+
+    localities = sorted({locality or '' for locality in localities})
+    con.execute(f"DELETE FROM {households} WHERE list_contains(?, locality)", [localities])
+    con.execute(f"""
+        INSERT INTO {households}
+        {_household_select(table_name, "coalesce(CAST(locality AS VARCHAR), '')", "list_contains($localities, locality)")}
+    """, {'localities': localities})
+    print(f"Refreshed households of {len(localities)} localities in '{households}'")
+    return len(localities)
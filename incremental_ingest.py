@@ -0,0 +1,187 @@
+import argparse
+import hashlib
+import os
+from pathlib import Path
+
+import duckdb
+
+from voter_ingest import TABLE_NAME, append_voter_rows, can_append_rows, decode_enum_columns, prepare_voter_table
+from voter_schema import check_header, create_voter_types, save_rejects, strict_csv_sql
+
+MANIFEST_TABLE = "ingest_manifest"
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(con):
+    """Return {source_file: (size, mtime, content_hash)} for previously loaded files"""
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+            source_file VARCHAR PRIMARY KEY,
+            size BIGINT,
+            mtime DOUBLE,
+            content_hash VARCHAR,
+            row_count BIGINT,
+            loaded_at TIMESTAMP
+        )
+    """)
+    rows = con.execute(f"SELECT source_file, size, mtime, content_hash FROM {MANIFEST_TABLE}").fetchall()
+    return {row[0]: row[1:] for row in rows}
+
+
+def plan_changes(csv_files, manifest):
+    """
+    Compare files on disk with the manifest
+
+    Files whose size and mtime match are skipped without hashing; a file
+    that was only touched keeps its rows but gets its manifest entry updated.
+
+    Returns (changed, touched, removed) where changed and touched map a
+    source file to its (size, mtime, content_hash).
+    """
+    changed = {}
+    touched = {}
+    for csv_file in csv_files:
+        stat = os.stat(csv_file)
+        known = manifest.get(csv_file)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime:
+            continue
+        content_hash = file_hash(csv_file)
+        if known and known[2] == content_hash:
+            touched[csv_file] = (stat.st_size, stat.st_mtime, content_hash)
+        else:
+            changed[csv_file] = (stat.st_size, stat.st_mtime, content_hash)
+    removed = [source_file for source_file in manifest if source_file not in csv_files]
+    return changed, touched, removed
+
+
+def incremental_ingest(folder_path, database_path, table_name=TABLE_NAME, voter_table=True, strict=False):
+    """
+    Bring table_name up to date with the CSV files in a folder
+
+    Only files that are new or whose contents changed are read. Their old
+    rows (matched on source_file) are replaced and rows of deleted files are
+    dropped, all in one transaction together with the manifest update, so
+    readers see either the previous or the new snapshot.
+
+    When the new rows fit the current columns and ENUM labels, they are
+    appended with new row ids and only the search structures of the changed
+    rows and localities are updated (see voter_ingest.append_voter_rows).
+    Otherwise the table is re-encoded and every structure rebuilt.
+
+    Parameters:
+    - folder_path: Folder containing the CSV files
+    - database_path: Path to DuckDB database file
+    - table_name: Name of the unified table
+    - voter_table: Rebuild the voter search structures after the update
+    - strict: Read changed files with the declared voter schema (see voter_schema.py)
+
+    Returns the open connection, or None on error
+    """
+    try:
+        con = duckdb.connect(database_path)
+        csv_files = [str(path.resolve()) for path in sorted(Path(folder_path).glob('*.csv'))]
+        manifest = read_manifest(con)
+        changed, touched, removed = plan_changes(csv_files, manifest)
+
+        print(f"{len(changed)} new or changed, {len(removed)} removed, "
+              f"{len(csv_files) - len(changed)} unchanged files")
+        if not changed and not removed and not touched:
+            return con
+
+        if strict:
+            for source_file in changed:
+                check_header(source_file)
+            create_voter_types(con)
+
+        table_exists = con.execute(
+            "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [table_name]
+        ).fetchone()[0] > 0
+
+        con.execute("BEGIN TRANSACTION")
+        try:
+            stale = list(changed) + removed
+            if changed:
+                file_list = ", ".join(f"'{source_file}'" for source_file in changed)
+                source = strict_csv_sql(list(changed)) if strict else f"""
+                    SELECT * EXCLUDE (filename), filename AS source_file
+                    FROM read_csv_auto([{file_list}], filename=true, union_by_name=true)
+                """
+                con.execute(f"CREATE OR REPLACE TEMP TABLE ingest_staging AS {source}")
+                if strict:
+                    rejected = save_rejects(con, table_name)
+                    if rejected:
+                        print(f"  Rejected {rejected} rows")
+            else:
+                con.execute("CREATE OR REPLACE TEMP TABLE ingest_staging (source_file VARCHAR)")
+
+            counts = dict(con.execute(
+                "SELECT source_file, COUNT(*) FROM ingest_staging GROUP BY source_file"
+            ).fetchall())
+
+            if voter_table and table_exists and stale and can_append_rows(con, 'ingest_staging', table_name):
+                # Existing row ids stay valid, so only the changed rows and localities are reprocessed
+                append_voter_rows(con, 'ingest_staging', stale, table_name)
+            else:
+                localities_sql = (f"SELECT DISTINCT CAST(locality AS VARCHAR) FROM {table_name} "
+                                  f"WHERE list_contains(?, source_file)")
+                changed_localities = set()
+                if table_exists and changed:
+                    decode_enum_columns(con, table_name)
+                if table_exists and stale:
+                    changed_localities.update(row[0] for row in con.execute(localities_sql, [stale]).fetchall())
+                    con.execute(f"DELETE FROM {table_name} WHERE list_contains(?, source_file)", [stale])
+                if changed and table_exists:
+                    con.execute(f"INSERT INTO {table_name} BY NAME SELECT * FROM ingest_staging")
+                elif changed:
+                    con.execute(f"CREATE TABLE {table_name} AS SELECT * FROM ingest_staging")
+                if changed:
+                    changed_localities.update(
+                        row[0] for row in con.execute(localities_sql, [list(changed)]).fetchall()
+                    )
+                if voter_table and (changed or removed):
+                    # New ENUM labels or columns: the table is re-encoded and its structures rebuilt
+                    prepare_voter_table(con, table_name,
+                                        changed_localities=changed_localities if table_exists else None)
+            con.execute("DROP TABLE ingest_staging")
+
+            if removed:
+                con.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE list_contains(?, source_file)", [removed])
+            for source_file, (size, mtime, content_hash) in {**changed, **touched}.items():
+                con.execute(f"""
+                    INSERT OR REPLACE INTO {MANIFEST_TABLE}
+                    VALUES (?, ?, ?, ?, coalesce(?, (SELECT row_count FROM {MANIFEST_TABLE} WHERE source_file = ?)), now())
+                """, [source_file, size, mtime, content_hash, counts.get(source_file), source_file])
+                if source_file in changed:
+                    print(f"  - {Path(source_file).name}: {counts.get(source_file, 0)} rows")
+
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+        return con
+
+    except Exception as e:
+        print(f"Error during incremental ingest: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally load a folder of voter CSV files into DuckDB")
+    parser.add_argument("folder", help="Folder containing the CSV files")
+    parser.add_argument("database", nargs="?", default="voter_data.duckdb", help="DuckDB database file")
+    parser.add_argument("--table", default=TABLE_NAME, help="Table to update")
+    parser.add_argument("--strict", action="store_true", help="Use the declared voter schema instead of type sniffing")
+    args = parser.parse_args()
+
+    con = incremental_ingest(args.folder, args.database, args.table, strict=args.strict)
+    if con:
+        con.close()
@@ -0,0 +1,153 @@
+from name_normalize import normalize_name, normalized_column
+from schema_catalog import ROW_ID_COLUMN
+
+# Name columns covered by the trigram index
+INDEXED_NAME_COLUMNS = ['first_name', 'last_name', 'relation_first_name', 'relation_last_name']
+
+# Terms shorter than this cannot be answered from the index
+TRIGRAM_SIZE = 3
+
+
+def trigram_index_name(table_name):
+    """Name of the posting-list table that indexes table_name"""
+    return f"{table_name}_trigrams"
+
+
+def term_trigrams(term):
+    """
+    Split a search term into its distinct normalized trigrams
+
+    Returns an empty list when the term is too short to use the index or
+    contains LIKE wildcards the index cannot reason about.
+    """
+    term = normalize_name(term)
+    if len(term) < TRIGRAM_SIZE or '%' in term or '_' in term:
+        return []
+    return sorted({term[i:i + TRIGRAM_SIZE] for i in range(len(term) - TRIGRAM_SIZE + 1)})
+
+
+def _postings_select(source, fields, value_expr=normalized_column, row_key=ROW_ID_COLUMN):
+    """SELECT of the distinct (field, trigram, row_id) postings of the rows in source"""
+    values = " UNION ALL ".join(
+        f"SELECT {row_key} AS row_id, '{field}' AS field, {value_expr(field)} AS value "
+        f"FROM {source} WHERE length({value_expr(field)}) >= {TRIGRAM_SIZE}"
+        for field in fields
+    )
+    return f"""
+        SELECT DISTINCT field, substr(value, pos, {TRIGRAM_SIZE}) AS trigram, row_id
+        FROM (
+            SELECT row_id, field, value,
+                   unnest(range(1, length(value) - {TRIGRAM_SIZE - 2})) AS pos
+            FROM ({values})
+        )
+    """
+
+
+def build_trigram_index(con, table_name='Delhi_Voter'):
+    """
+    Build the trigram posting-list index for the name columns of table_name
+
+    One row is stored per (field, trigram) with the sorted list of row ids
+    whose normalized value contains that trigram (the *_norm companion column
+    when present, LOWER() of the raw column otherwise). Rows are identified by
+    the row_id column (DuckDB rowid if the table has none), so the index must
+    be rebuilt whenever table_name is rewritten.
+
+    Parameters:
+    - con: Open DuckDB connection
+    - table_name: Name of the voter table to index
+    """
+    columns = [row[0] for row in con.execute(f"DESCRIBE {table_name}").fetchall()]
+    fields = [col for col in INDEXED_NAME_COLUMNS if col in columns]
+    index_name = trigram_index_name(table_name)
+
+    if not fields:
+        print(f"No name columns found in '{table_name}', skipping trigram index")
+        return 0
+
+    row_key = ROW_ID_COLUMN if ROW_ID_COLUMN in columns else 'rowid'
+
+    def value_expr(field):
+        norm = normalized_column(field)
+        return norm if norm in columns else f"LOWER({field})"
+
+    con.execute(f"""
+        CREATE OR REPLACE TABLE {index_name} AS
+        SELECT field, trigram, list(row_id ORDER BY row_id) AS row_ids
+        FROM ({_postings_select(table_name, fields, value_expr, row_key)})
+        GROUP BY field, trigram
+        ORDER BY field, trigram
+    """)
+
+    count = con.execute(f"SELECT COUNT(*) FROM {index_name}").fetchone()[0]
+    print(f"Built trigram index '{index_name}' with {count} posting lists")
+    return count
+
+
+def update_trigram_index(con, deleted_rows, inserted_rows, table_name='Delhi_Voter'):
+    """
+    Apply deleted and inserted rows to the trigram index without rebuilding it
+
+    deleted_rows and inserted_rows are tables holding row_id and the *_norm
+    columns of the rows removed from / added to table_name. Only the posting
+    lists of trigrams occurring in those rows are rewritten. Falls back to a
+    full build when the index does not exist yet.
+    """
+    index_name = trigram_index_name(table_name)
+    exists = con.execute("SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [index_name]).fetchone()[0] > 0
+    columns = [row[0] for row in con.execute(f"DESCRIBE {table_name}").fetchall()]
+    fields = [col for col in INDEXED_NAME_COLUMNS if normalized_column(col) in columns]
+    if not exists or not fields:
+        return build_trigram_index(con, table_name)
+
+    con.execute(f"CREATE OR REPLACE TEMP TABLE trigram_added AS {_postings_select(inserted_rows, fields)}")
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE trigram_affected AS
+        SELECT DISTINCT field, trigram FROM ({_postings_select(deleted_rows, fields)})
+        UNION
+        SELECT DISTINCT field, trigram FROM trigram_added
+    """)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE trigram_rebuilt AS
+        SELECT field, trigram, list(row_id ORDER BY row_id) AS row_ids
+        FROM (
+            SELECT i.field, i.trigram, unnest(i.row_ids) AS row_id
+            FROM {index_name} i
+            JOIN trigram_affected a ON a.field = i.field AND a.trigram = i.trigram
+            UNION ALL
+            SELECT field, trigram, row_id FROM trigram_added
+        )
+        WHERE row_id NOT IN (SELECT row_id FROM {deleted_rows})
+        GROUP BY field, trigram
+    """)
+    con.execute(f"""
+        DELETE FROM {index_name} USING trigram_affected a
+        WHERE {index_name}.field = a.field AND {index_name}.trigram = a.trigram
+    """)
+    con.execute(f"INSERT INTO {index_name} SELECT * FROM trigram_rebuilt")
+
+    count = con.execute("SELECT COUNT(*) FROM trigram_affected").fetchone()[0]
+    for temp in ('trigram_added', 'trigram_affected', 'trigram_rebuilt'):
+        con.execute(f"DROP TABLE {temp}")
+    print(f"Updated {count} posting lists of trigram index '{index_name}'")
+    return count
+
+
+def trigram_condition(field, param_name, table_name='Delhi_Voter', row_key=ROW_ID_COLUMN):
+    """
+    SQL predicate restricting rows to index candidates for one name field
+
+    The trigram list must be bound as ${param_name}; row_key is the column the
+    index was built on. Candidates still need the LIKE check, since sharing
+    every trigram does not imply a substring match.
+    """
+    index_name = trigram_index_name(table_name)
+    return f"""{row_key} IN (
+            SELECT row_id FROM (
+                SELECT unnest(row_ids) AS row_id FROM {index_name}
+                WHERE field = '{field}' AND list_contains(${param_name}, trigram)
+            )
+            GROUP BY row_id
+            HAVING COUNT(*) = len(${param_name})
+        )"""
+
@@ -0,0 +1,81 @@
+import re
+import unicodedata
+
+# Text columns that get a normalized companion column at ingest
+NORMALIZED_COLUMNS = ['first_name', 'last_name', 'relation_first_name', 'relation_last_name', 'locality']
+
+NORMALIZED_SUFFIX = '_norm'
+
+_WHITESPACE = re.compile(r'\s+')
+
+# House number normalization: drop an 'H.No.' style prefix, unify separators, join '12/A' -> '12a'
+_HOUSE_PREFIX = r'^(h\.?\s*no\.?|house\s*no\.?|no\.)\s*'
+_HOUSE_SEPARATORS = r'[^a-z0-9]+'
+_HOUSE_SUFFIX_LETTER = r'([0-9])/([a-z])'
+
+
+def normalized_column(column):
+    """Name of the normalized companion column for column"""
+    return f"{column}{NORMALIZED_SUFFIX}"
+
+
+def normalize_name(value):
+    """
+    Normalize a name the same way the ingest stage does
+
+    Strips diacritics from romanized names (e.g. 'Śarmā' -> 'sarma'),
+    lower-cases and collapses runs of whitespace into a single space.
+    """
+    if value is None:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(value))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _WHITESPACE.sub(' ', stripped.lower()).strip()
+
+
+def normalize_sql(column):
+    """DuckDB expression equivalent to normalize_name() applied to column"""
+    return f"trim(regexp_replace(lower(strip_accents({column})), '\\s+', ' ', 'g'))"
+
+
+def normalized_expressions(columns):
+    """
+    Companion columns to materialize at ingest for the given table columns
+
+    Returns {normalized column name: DuckDB expression}.
+    """
+    return {normalized_column(col): normalize_sql(col) for col in NORMALIZED_COLUMNS if col in columns}
+
+
+def prefix_range(value):
+    """
+    Half-open range [low, high) of normalized strings starting with value
+
+    e.g. 'Ram' -> ('ram', 'ran'), so a prefix search can be a range predicate
+    on a *_norm column instead of a LIKE pattern.
+    """
+    low = normalize_name(value)
+    if not low:
+        return '', None
+    return low, low[:-1] + chr(ord(low[-1]) + 1)
+
+
+def normalize_house_number(value):
+    """
+    Normalize a house number the same way the household table does
+
+    'H.No. 12-A', '12 A' and '12/a' all become '12a'; other separators
+    become '/', e.g. 'B-4/17' -> 'b/4/17'.
+    """
+    if value is None:
+        return ''
+    text = re.sub(_HOUSE_PREFIX, '', str(value).strip().lower())
+    text = re.sub(_HOUSE_SEPARATORS, '/', text).strip('/')
+    return re.sub(_HOUSE_SUFFIX_LETTER, r'\1\2', text)
+
+
+def house_number_sql(column):
+    """DuckDB expression equivalent to normalize_house_number() applied to column"""
+    text = f"regexp_replace(lower(trim(CAST({column} AS VARCHAR))), '{_HOUSE_PREFIX}', '')"
+    text = f"trim(regexp_replace({text}, '{_HOUSE_SEPARATORS}', '/', 'g'), '/')"
+    return f"coalesce(regexp_replace({text}, '{_HOUSE_SUFFIX_LETTER}', '\\1\\2', 'g'), '')"
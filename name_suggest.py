@@ -0,0 +1,98 @@
+from name_normalize import normalized_column, prefix_range
+
+# Name fields offered as live suggestions
+SUGGEST_FIELDS = ['first_name', 'last_name']
+
+SUGGEST_LIMIT = 10  # Suggestions returned per lookup
+
+
+def name_table_name(table_name):
+    """Name of the distinct-name table used for suggestions"""
+    return f"{table_name}_names"
+
+
+def _names_select(table_name, fields, changed_names=None):
+    """(field, name, display, frequency) of table_name, limited to the pairs in changed_names if given"""
+    def where(field):
+        norm = normalized_column(field)
+        if changed_names is None:
+            return f"{norm} <> ''"
+        return f"{norm} <> '' AND {norm} IN (SELECT name FROM {changed_names} WHERE field = '{field}')"
+
+    return " UNION ALL ".join(f"""
+        SELECT '{field}' AS field, {normalized_column(field)} AS name,
+               mode({field}) AS display, COUNT(*) AS frequency
+        FROM {table_name}
+        WHERE {where(field)}
+        GROUP BY {normalized_column(field)}
+    """ for field in fields)
+
+
+def build_name_table(con, table_name='Delhi_Voter'):
+    """
+    Build the distinct-name table behind live suggestions
+
+    One row per (field, normalized name) with its most common spelling and
+    how many voters carry it, sorted by field and name so a prefix lookup
+    reads a handful of rows instead of scanning the voter table.
+    """
+    columns = [row[0] for row in con.execute(f"DESCRIBE {table_name}").fetchall()]
+    fields = [col for col in SUGGEST_FIELDS if normalized_column(col) in columns]
+    names_table = name_table_name(table_name)
+
+    if not fields:
+        print(f"No normalized name columns found in '{table_name}', skipping name table")
+        return 0
+
+    con.execute(f"CREATE OR REPLACE TABLE {names_table} AS SELECT * FROM ({_names_select(table_name, fields)}) "
+                f"ORDER BY field, name")
+
+    count = con.execute(f"SELECT COUNT(*) FROM {names_table}").fetchone()[0]
+    print(f"Built name table '{names_table}' with {count} names")
+    return count
+
+
+def refresh_name_table(con, changed_names, table_name='Delhi_Voter'):
+    """
+    Recount the names of changed rows in the distinct-name table
+
+    changed_names is a table of (field, name) pairs (normalized names) taken
+    from deleted and inserted rows; only their rows are deleted and
+    re-aggregated from table_name. Falls back to a full build when the name
+    table does not exist yet.
+    """
+    names_table = name_table_name(table_name)
+    exists = con.execute("SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [names_table]).fetchone()[0] > 0
+    if not exists:
+        return build_name_table(con, table_name)
+
+    columns = [row[0] for row in con.execute(f"DESCRIBE {table_name}").fetchall()]
+    fields = [col for col in SUGGEST_FIELDS if normalized_column(col) in columns]
+    con.execute(f"""
+        DELETE FROM {names_table} USING {changed_names} c
+        WHERE {names_table}.field = c.field AND {names_table}.name = c.name
+    """)
+    if fields:
+        con.execute(f"INSERT INTO {names_table} SELECT * FROM ({_names_select(table_name, fields, changed_names)}) "
+                    f"ORDER BY field, name")
+
+    print(f"Refreshed name table '{names_table}' for the changed names")
+
+
+def suggest_names(conn, field, prefix, table_name='Delhi_Voter', limit=SUGGEST_LIMIT):
+    """
+    Most frequent spellings of field starting with prefix
+
+    A range lookup on the sorted distinct-name table, so it reads a handful
+    of rows and is cheap enough to run on every keystroke.
+    """
+    low, high = prefix_range(prefix)
+    if not low:
+        return []
+    rows = conn.execute(f"""
+        SELECT display FROM {name_table_name(table_name)}
+        WHERE field = ? AND name >= ? AND name < ?
+        ORDER BY frequency DESC, name
+        LIMIT ?
+    """, [field, low, high, limit]).fetchall()
+    return [row[0] for row in rows]
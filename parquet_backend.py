@@ -0,0 +1,219 @@
+import argparse
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import duckdb
+
+from schema_catalog import ROW_ID_COLUMN
+from voter_schema import TABLE_NAME
+
+# Subfolder holding the non-partitioned companion tables (trigram index, ...)
+TABLES_DIR = "_tables"
+
+
+def partition_glob(output_dir, table_name=TABLE_NAME):
+    """Glob matching every Parquet file of the partitioned table"""
+    return str(Path(output_dir).resolve() / table_name / "*" / "*.parquet")
+
+
+def companion_tables(con, table_name=TABLE_NAME):
+    """Tables stored next to the voter table (named {table_name}_...)"""
+    rows = con.execute(
+        "SELECT table_name FROM duckdb_tables() WHERE starts_with(table_name, ?) ORDER BY table_name",
+        [f"{table_name}_"]
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def export_partitioned(con, output_dir, table_name=TABLE_NAME, partition_by='locality'):
+    """
+    Export the voter table as Hive-partitioned Parquet
+
+    Writes {output_dir}/{table_name}/{partition_by}=<value>/*.parquet plus one
+    Parquet file per companion table under {output_dir}/_tables.
+
+    Parameters:
+    - con: DuckDB connection holding the prepared voter table
+    - output_dir: Folder to write (replaced if it exists)
+    - table_name: Voter table to export
+    - partition_by: Column to partition on, e.g. locality or source_file (constituency)
+    """
+    output_dir = Path(output_dir).resolve()
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    (output_dir / TABLES_DIR).mkdir(parents=True)
+
+    print(f"Exporting '{table_name}' partitioned by {partition_by} to {output_dir}")
+    con.execute(f"""
+        COPY (SELECT * FROM {table_name})
+        TO '{output_dir / table_name}' (FORMAT parquet, PARTITION_BY ({partition_by}))
+    """)
+
+    for name in companion_tables(con, table_name):
+        con.execute(f"COPY {name} TO '{output_dir / TABLES_DIR / name}.parquet' (FORMAT parquet)")
+
+    partitions = len([p for p in (output_dir / table_name).iterdir() if p.is_dir()])
+    print(f"Wrote {partitions} partitions")
+    return partitions
+
+
+def create_parquet_views(views_database, output_dir, table_name=TABLE_NAME):
+    """
+    Create a DuckDB file whose tables are views over the Parquet export
+
+    The search app opens views_database like a normal database. It holds no
+    data, so any number of app replicas can open their own copy read-only
+    while the Parquet files are shared.
+    """
+    output_dir = Path(output_dir).resolve()
+    con = duckdb.connect(views_database)
+    try:
+        con.execute(f"""
+            CREATE OR REPLACE VIEW {table_name} AS
+            SELECT * FROM read_parquet('{partition_glob(output_dir, table_name)}', hive_partitioning=true)
+        """)
+        for parquet_file in sorted((output_dir / TABLES_DIR).glob("*.parquet")):
+            con.execute(f"CREATE OR REPLACE VIEW {parquet_file.stem} AS SELECT * FROM read_parquet('{parquet_file}')")
+        con.execute("CHECKPOINT")
+        print(f"Created views over {output_dir} in {views_database}")
+    finally:
+        con.close()
+
+
+def stale_partitions(con, output_dir, values, table_name=TABLE_NAME, partition_by='locality'):
+    """
+    Partition values, other than values, whose exported rows no longer match con
+
+    Partitions are compared on row count and row ids, so a reload that
+    renumbered rows (a full rebuild) shows up even where the rows are the same.
+    """
+    columns = [row[0] for row in con.execute(f"DESCRIBE {table_name}").fetchall()]
+    row_ids = (f"sum({ROW_ID_COLUMN}), min({ROW_ID_COLUMN}), max({ROW_ID_COLUMN})"
+               if ROW_ID_COLUMN in columns else "0, 0, 0")
+    part = f"coalesce(CAST({partition_by} AS VARCHAR), '') AS part"
+    rows = con.execute(f"""
+        WITH source AS (
+            SELECT {part}, COUNT(*), {row_ids} FROM {table_name} GROUP BY ALL
+        ),
+        exported AS (
+            SELECT {part}, COUNT(*), {row_ids}
+            FROM read_parquet('{partition_glob(output_dir, table_name)}', hive_partitioning=true)
+            GROUP BY ALL
+        )
+        SELECT DISTINCT part FROM (
+            (SELECT * FROM source EXCEPT SELECT * FROM exported)
+            UNION ALL
+            (SELECT * FROM exported EXCEPT SELECT * FROM source)
+        )
+        WHERE NOT list_contains(?, part)
+        ORDER BY part
+    """, [list(values)]).fetchall()
+    return [row[0] for row in rows]
+
+
+def changed_companion_tables(con, output_dir, table_name=TABLE_NAME):
+    """Companion tables present in con or in the export but not in both"""
+    exported = {path.stem for path in (Path(output_dir).resolve() / TABLES_DIR).glob("*.parquet")}
+    return sorted(exported ^ set(companion_tables(con, table_name)))
+
+
+def replace_companion_tables(con, output_dir, table_name=TABLE_NAME):
+    """Re-export every companion table, swapping each file in with a rename"""
+    tables_dir = Path(output_dir).resolve() / TABLES_DIR
+    names = companion_tables(con, table_name)
+    for name in names:
+        staging = tables_dir / f".{name}.parquet.staging"
+        con.execute(f"COPY {name} TO '{staging}' (FORMAT parquet)")
+        os.replace(staging, tables_dir / f"{name}.parquet")
+    print(f"Re-exported {len(names)} companion tables")
+    return len(names)
+
+
+def replace_partition(con, output_dir, values, table_name=TABLE_NAME, partition_by='locality', views_database=None):
+    """
+    Rewrite the Parquet partitions of some values (e.g. the localities of an update) from con
+
+    Each new partition is written to a staging folder next to the export and
+    swapped in with renames, so the other partitions are never touched. The
+    companion tables (trigram index, households, relation edges, summaries,
+    ...) refer to row ids across all partitions, so they are re-exported too.
+    Touching views_database changes its modification time, which is how the
+    app's schema and result caches notice the update.
+
+    Raises ValueError before writing anything if another partition no longer
+    matches con (e.g. a full reload renumbered the row ids, or the update
+    touched more localities than were given) or the set of companion tables
+    changed; run export again in that case.
+    """
+    values = [values] if isinstance(values, str) else list(values)
+    stale = stale_partitions(con, output_dir, values, table_name, partition_by)
+    if stale:
+        shown = ", ".join(repr(part) for part in stale[:5]) + (", ..." if len(stale) > 5 else "")
+        raise ValueError(f"{len(stale)} other partitions are out of date ({shown}); "
+                         f"replace them as well or run export again")
+    changed = changed_companion_tables(con, output_dir, table_name)
+    if changed:
+        raise ValueError(f"Companion tables changed ({', '.join(changed)}); run export again")
+    present = {row[0] for row in con.execute(
+        f"SELECT DISTINCT CAST({partition_by} AS VARCHAR) FROM {table_name} WHERE list_contains(?, CAST({partition_by} AS VARCHAR))",
+        [values]
+    ).fetchall()}
+    missing = [value for value in values if value not in present]
+    if missing:
+        raise ValueError(f"No rows with {partition_by} = {missing[0]!r}")
+
+    table_dir = Path(output_dir).resolve() / table_name
+    for value in values:
+        staging = Path(tempfile.mkdtemp(prefix=".staging_", dir=table_dir.parent))
+        try:
+            con.execute(f"""
+                COPY (SELECT * FROM {table_name} WHERE CAST({partition_by} AS VARCHAR) = ?)
+                TO '{staging}' (FORMAT parquet, PARTITION_BY ({partition_by}), OVERWRITE_OR_IGNORE)
+            """, [value])
+            written = [p for p in staging.iterdir() if p.is_dir()]
+            target = table_dir / written[0].name
+            retired = staging / "retired"
+            if target.exists():
+                target.rename(retired)
+            written[0].rename(target)
+            print(f"Replaced partition {target.name}")
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    replace_companion_tables(con, output_dir, table_name)
+
+    if views_database and os.path.exists(views_database):
+        os.utime(views_database)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partitioned Parquet storage for the voter table")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export the voter table and create the views database")
+    export_parser.add_argument("database", help="Source DuckDB database file")
+    export_parser.add_argument("output_dir", help="Folder for the Parquet files")
+    export_parser.add_argument("views_database", help="DuckDB file to hold the views (point VOTER_DB_PATH at it)")
+    export_parser.add_argument("--partition-by", default="locality", help="Partition column")
+
+    replace_parser = subparsers.add_parser("replace-partition",
+                                           help="Rewrite the partitions of some values and the companion tables")
+    replace_parser.add_argument("database", help="Source DuckDB database file")
+    replace_parser.add_argument("output_dir", help="Folder holding the Parquet export")
+    replace_parser.add_argument("values", nargs="+", help="Partition values, e.g. the updated locality names")
+    replace_parser.add_argument("--views-database", help="Views database to mark as changed")
+    replace_parser.add_argument("--partition-by", default="locality", help="Partition column")
+
+    parser.add_argument("--table", default=TABLE_NAME, help="Voter table name")
+    args = parser.parse_args()
+
+    con = duckdb.connect(args.database, read_only=True)
+    try:
+        if args.command == "export":
+            export_partitioned(con, args.output_dir, args.table, args.partition_by)
+            create_parquet_views(args.views_database, args.output_dir, args.table)
+        else:
+            replace_partition(con, args.output_dir, args.values, args.table, args.partition_by, args.views_database)
+    finally:
+        con.close()
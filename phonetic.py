@@ -0,0 +1,156 @@
+import re
+
+import pandas as pd
+
+from name_index import INDEXED_NAME_COLUMNS
+from name_normalize import normalize_name, normalized_column
+
+# Candidates further than this many edits from the search term are dropped
+PHONETIC_MAX_DISTANCE = 3
+
+# Spelling variants common in romanized Hindi names, applied in order
+_REWRITES = [
+    ('ksh', 'ks'), ('x', 'ks'),
+    ('chh', 'c'), ('ch', 'c'),
+    ('sh', 's'), ('ph', 'f'), ('bh', 'b'), ('kh', 'k'), ('gh', 'g'),
+    ('th', 't'), ('dh', 'd'), ('jh', 'j'),
+    ('ck', 'k'), ('q', 'k'), ('z', 'j'), ('w', 'v'),
+]
+
+_NON_LETTERS = re.compile(r'[^a-z]')
+_VOWELS = re.compile(r'[aeiouy]')
+_REPEATS = re.compile(r'(.)\1+')
+
+
+def phonetic_index_name(table_name):
+    """Name of the table mapping phonetic keys to normalized names"""
+    return f"{table_name}_phonetic"
+
+
+def phonetic_key(token):
+    """
+    Phonetic key of a single romanized name token
+
+    Spelling variants collapse to the same key, e.g. Sharma / Sarma / Shrma
+    -> 'srm' and Verma / Varma / Wermaa -> 'vrm'. Like Soundex, the first
+    sound is kept and later vowels are dropped, but the consonant rules are
+    tuned for transliterated Indian names (aspirated 'h' digraphs, v/w, z/j).
+    """
+    token = _NON_LETTERS.sub('', normalize_name(token))
+    if not token:
+        return ''
+    for pattern, replacement in _REWRITES:
+        token = token.replace(pattern, replacement)
+    first = 'a' if _VOWELS.match(token) else token[0]
+    rest = _VOWELS.sub('', token[1:]).replace('h', '')
+    return _REPEATS.sub(r'\1', first + rest)
+
+
+def term_keys(term):
+    """Distinct phonetic keys of the tokens of a search term"""
+    return sorted({key for key in (phonetic_key(token) for token in normalize_name(term).split()) if key})
+
+
+def _insert_keys(con, index_name, names):
+    """Append the phonetic keys of (field, name) pairs to the index table, sorted by field and key"""
+    keys = pd.DataFrame(
+        [(field, phonetic_key(token), name) for field, name in names for token in set(name.split())],
+        columns=['field', 'key', 'name']
+    )
+    keys = keys[keys['key'] != ''].drop_duplicates()
+
+    con.register('phonetic_keys_df', keys)
+    try:
+        con.execute(f"INSERT INTO {index_name} SELECT field, key, name FROM phonetic_keys_df ORDER BY field, key")
+    finally:
+        con.unregister('phonetic_keys_df')
+    return keys
+
+
+def build_phonetic_index(con, table_name='Delhi_Voter'):
+    """
+    Build the phonetic key table for the name columns of table_name
+
+    Keys are computed once per distinct normalized name (not per row) and
+    stored as (field, key, name) sorted by field and key, so a search looks
+    up the matching spellings and then filters rows on the *_norm column.
+    Requires the normalized columns written by voter_ingest.rewrite_voter_table.
+    """
+    columns = [row[0] for row in con.execute(f"DESCRIBE {table_name}").fetchall()]
+    fields = [col for col in INDEXED_NAME_COLUMNS if normalized_column(col) in columns]
+    index_name = phonetic_index_name(table_name)
+
+    if not fields:
+        print(f"No normalized name columns found in '{table_name}', skipping phonetic index")
+        return 0
+
+    names = con.execute(" UNION ".join(
+        f"SELECT DISTINCT '{field}' AS field, {normalized_column(field)} AS name "
+        f"FROM {table_name} WHERE {normalized_column(field)} <> ''"
+        for field in fields
+    )).fetchall()
+
+    con.execute(f"CREATE OR REPLACE TABLE {index_name} (field VARCHAR, key VARCHAR, name VARCHAR)")
+    keys = _insert_keys(con, index_name, names)
+
+    print(f"Built phonetic index '{index_name}' for {len(names)} distinct names")
+    return len(keys)
+
+
+def update_phonetic_index(con, changed_names, table_name='Delhi_Voter'):
+    """
+    Bring the phonetic index up to date for the names of changed rows
+
+    changed_names is a table of (field, name) pairs (normalized names) taken
+    from deleted and inserted rows. Their keys are dropped and re-added for
+    the names still present in table_name. Falls back to a full build when
+    the index does not exist yet.
+    """
+    index_name = phonetic_index_name(table_name)
+    exists = con.execute("SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [index_name]).fetchone()[0] > 0
+    if not exists:
+        return build_phonetic_index(con, table_name)
+
+    columns = [row[0] for row in con.execute(f"DESCRIBE {table_name}").fetchall()]
+    fields = [col for col in INDEXED_NAME_COLUMNS if normalized_column(col) in columns]
+    con.execute(f"""
+        DELETE FROM {index_name} USING {changed_names} c
+        WHERE {index_name}.field = c.field AND {index_name}.name = c.name
+    """)
+    present = " UNION ".join(f"""
+        SELECT DISTINCT c.field, c.name FROM {changed_names} c
+        WHERE c.field = '{field}' AND c.name IN (SELECT {normalized_column(field)} FROM {table_name})
+    """ for field in fields)
+    names = con.execute(present).fetchall() if fields else []
+    keys = _insert_keys(con, index_name, names)
+
+    print(f"Updated phonetic index '{index_name}' for {len(names)} names")
+    return len(keys)
+
+
+def phonetic_condition(field, keys_param, table_name='Delhi_Voter'):
+    """
+    SQL predicate matching rows whose name sounds like the search term
+
+    The term's keys (term_keys) must be bound as ${keys_param}; every key has
+    to match one token of the name.
+    """
+    index_name = phonetic_index_name(table_name)
+    return f"""{normalized_column(field)} IN (
+            SELECT name FROM {index_name}
+            WHERE field = '{field}' AND list_contains(${keys_param}, key)
+            GROUP BY name
+            HAVING COUNT(DISTINCT key) = len(${keys_param})
+        )"""
+
+
+def distance_sql(field, term_param):
+    """
+    Edit distance between a normalized name column and the bound term ${term_param}
+
+    The smaller of the distance to the whole name and to its closest token,
+    so 'raam' is one edit from 'ram kumar'.
+    """
+    column = normalized_column(field)
+    return (f"least(levenshtein({column}, ${term_param}), "
+            f"list_min(list_transform(string_split({column}, ' '), lambda t: levenshtein(t, ${term_param}))))")
@@ -0,0 +1,272 @@
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+import pandas as pd
+
+SLOW_QUERY_MS = 500  # Searches slower than this get an EXPLAIN ANALYZE profile
+QUERY_LOG_MAX_BYTES = 5 * 1024 * 1024  # Size at which the query log rotates
+QUERY_LOG_BACKUPS = 3  # Rotated query logs kept next to the current one
+PROFILE_QUEUE_SIZE = 8  # Slow searches waiting for a profile; further ones are logged unprofiled
+PROFILE_INTERVAL = 60  # Seconds between two profiles of the same search pattern
+PROFILE_WAIT = 1.0  # Seconds a profile waits for a free pooled cursor before it is skipped
+
+# Search criteria, in the order they appear in a search pattern
+SEARCH_CRITERIA = ['first_name', 'last_name', 'locality', 'house_number',
+                   'relation_first_name', 'relation_last_name', 'duplicates_only']
+# Quoted constants in plan text, and lists of them (e.g. the trigrams of a searched name)
+_LITERAL_LIST = re.compile(r"\[\s*'(?:[^']|'')*'(?:\s*,\s*'(?:[^']|'')*')*\s*\]")
+_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+LOG_COLUMNS = ['timestamp', 'search', 'pattern', 'wall_ms', 'rows_returned', 'matches', 'rows_scanned', 'slow',
+               'error', 'statement', 'plan']
+
+
+def search_pattern(params):
+    """
+    Shape of a search without its values, e.g. 'last_name + locality [prefix]'
+
+    Searches of the same shape run the same statement, so the pattern is
+    what slow-query statistics are grouped by.
+    """
+    criteria = [name for name in SEARCH_CRITERIA if params.get(name) and params.get(name) != "All"]
+    return f"{' + '.join(criteria) or 'no criteria'} [{params.get('match_mode') or 'contains'}]"
+
+
+def redact_literals(text):
+    """
+    Replace the quoted constants in plan or error text with ?
+
+    EXPLAIN ANALYZE prints bound parameters inline, e.g.
+    first_name_norm>='sunita' or list_contains(['sun', 'uni'], trigram),
+    so filters are redacted before they are logged.
+    """
+    return _LITERAL.sub("?", _LITERAL_LIST.sub("[?]", text))
+
+
+def plan_summary(node, depth=0):
+    """Indented operator lines (rows out, rows scanned, time) of an EXPLAIN ANALYZE JSON tree"""
+    lines = []
+    if 'operator_name' in node:
+        extra = node.get('extra_info') or {}
+        detail = extra.get('Table') or extra.get('Join Type') or ''
+        filters = extra.get('Filters')
+        if filters:
+            detail += f" filters: {redact_literals('; '.join(filters) if isinstance(filters, list) else filters)}"
+        lines.append(f"{'  ' * depth}{node['operator_name']} "
+                     f"rows={node.get('operator_cardinality', 0)} scanned={node.get('operator_rows_scanned', 0)} "
+                     f"{node.get('operator_timing', 0) * 1000:.1f} ms {detail}".rstrip())
+        depth += 1
+    for child in node.get('children', []):
+        lines.extend(plan_summary(child, depth))
+    return lines
+
+
+def explain_analyze(conn, statement, params):
+    """Run statement under EXPLAIN ANALYZE, returning (rows scanned, plan summary text)"""
+    profile = json.loads(conn.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}", params).fetchone()[1])
+    return profile.get('cumulative_rows_scanned'), "\n".join(plan_summary(profile))
+
+
+class QueryTrack:
+    """What a tracked search reports back: the statement to profile, the rows it returned and its total matches"""
+
+    def __init__(self):
+        self.statement = None
+        self.params = None
+        self.rows_returned = None
+        self.matches = None
+
+    def set_statement(self, statement, params):
+        """The statement that is profiled if the search turns out slow"""
+        self.statement = statement
+        self.params = params
+
+
+class QueryProfiler:
+    """
+    Records the wall time of every search to a rotating JSON-lines log
+
+    Searches slower than threshold_ms are re-run under EXPLAIN ANALYZE on a
+    background thread, and the rows scanned and the plan are logged with
+    them. Only the statement text and the search pattern are written, never
+    the searched values: constants in plan filters and error messages are
+    replaced with ? (see redact_literals).
+
+    Profiling is rationed so it cannot pile up behind a burst of slow
+    searches: at most max_pending profiles wait at a time, each search
+    pattern is profiled at most once per profile_interval seconds, and with
+    a pool a profile borrows one of its cursors (skipped if none frees up
+    within PROFILE_WAIT seconds). Skipped profiles are logged with the reason
+    in place of the plan.
+
+    Parameters:
+    - log_path: Query log file; rotated copies are log_path.1, log_path.2, ...
+      None or '' turns the profiler off entirely (nothing is timed or written)
+    - threshold_ms: Wall time above which a search is profiled; None logs timings without profiling
+    - max_bytes: Size at which the log rotates
+    - backups: Number of rotated logs kept
+    - pool: ConnectionPool the profiles borrow cursors from (default: a new cursor of the searched connection)
+    - max_pending: Profiles allowed to wait at a time
+    - profile_interval: Seconds between two profiles of the same pattern
+    """
+
+    def __init__(self, log_path, threshold_ms=SLOW_QUERY_MS, max_bytes=QUERY_LOG_MAX_BYTES, backups=QUERY_LOG_BACKUPS,
+                 pool=None, max_pending=PROFILE_QUEUE_SIZE, profile_interval=PROFILE_INTERVAL):
+        self.log_path = log_path or None
+        self.threshold_ms = threshold_ms
+        self.pool = pool
+        self.max_pending = max_pending
+        self.profile_interval = profile_interval
+        self._logger = None
+        self._explainer = None
+        if self.log_path:
+            self._logger = logging.getLogger(f"query_profile.{os.path.abspath(log_path)}")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            if not self._logger.handlers:
+                handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                self._logger.addHandler(handler)
+            if threshold_ms is not None:
+                self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='query-profile')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_profiled = {}
+        self.tracked = 0
+        self.slow = 0
+        self.skipped = 0
+
+    @property
+    def enabled(self):
+        """Whether searches are logged at all"""
+        return self._logger is not None
+
+    @contextmanager
+    def track(self, conn, search, pattern):
+        """
+        Time the with-block as one search and log it
+
+        Parameters:
+        - conn: Connection the search runs on (slow statements are profiled on a new cursor of it
+          when the profiler has no pool)
+        - search: Name of the search function
+        - pattern: Search pattern (see search_pattern)
+
+        Yields a QueryTrack for the block to fill in. Exceptions are logged
+        with the entry and re-raised.
+        """
+        track = QueryTrack()
+        if not self.enabled:
+            yield track
+            return
+        entry = {'timestamp': datetime.now().isoformat(timespec='seconds'), 'search': search, 'pattern': pattern}
+        started = time.perf_counter()
+        try:
+            yield track
+        except Exception as e:
+            entry['error'] = redact_literals(str(e))
+            raise
+        finally:
+            entry['wall_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            entry['rows_returned'] = track.rows_returned
+            entry['matches'] = track.matches
+            entry['statement'] = track.statement
+            entry['slow'] = self.threshold_ms is not None and entry['wall_ms'] >= self.threshold_ms
+            with self._lock:
+                self.tracked += 1
+                self.slow += entry['slow']
+            if entry['slow'] and track.statement and 'error' not in entry:
+                self._submit(conn, entry, track.statement, track.params)
+            else:
+                self._write(entry)
+
+    def _submit(self, conn, entry, statement, params):
+        """Queue a profile of a slow search, or log it unprofiled if profiling is rationed out"""
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_profiled.get(entry['pattern'])
+            if self._pending >= self.max_pending:
+                reason = "profile skipped: queue full"
+            elif last is not None and now - last < self.profile_interval:
+                reason = "profile skipped: pattern profiled recently"
+            else:
+                reason = None
+                self._pending += 1
+                self._last_profiled[entry['pattern']] = now
+            if reason:
+                self.skipped += 1
+        if reason:
+            entry['plan'] = reason
+            self._write(entry)
+            return
+        cursor = None if self.pool else conn.cursor()
+        self._explainer.submit(self._profile, cursor, entry, statement, params)
+
+    def _profile(self, cursor, entry, statement, params):
+        try:
+            if cursor is None:
+                with self.pool.connection(timeout=PROFILE_WAIT) as pooled:
+                    entry['rows_scanned'], entry['plan'] = explain_analyze(pooled, statement, params)
+            else:
+                entry['rows_scanned'], entry['plan'] = explain_analyze(cursor, statement, params)
+        except queue.Empty:
+            entry['plan'] = "profile skipped: no free connection"
+            with self._lock:
+                self.skipped += 1
+        except Exception as e:
+            entry['plan'] = f"EXPLAIN ANALYZE failed: {redact_literals(str(e))}"
+        finally:
+            if cursor is not None:
+                cursor.close()
+            with self._lock:
+                self._pending -= 1
+        self._write(entry)
+
+    def _write(self, entry):
+        self._logger.info(json.dumps(entry, default=str))
+
+    def stats(self):
+        """Searches tracked, found slow and left unprofiled since startup"""
+        with self._lock:
+            return {'tracked': self.tracked, 'slow': self.slow, 'skipped_profiles': self.skipped}
+
+
+def read_query_log(log_path):
+    """Entries of the query log and its rotated copies as a DataFrame, oldest first"""
+    frames = []
+    for path in [f"{log_path}.{index}" for index in range(QUERY_LOG_BACKUPS, 0, -1)] + [log_path]:
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            frames.append(pd.read_json(path, lines=True, dtype=False))
+    if not frames:
+        return pd.DataFrame(columns=LOG_COLUMNS)
+    log = pd.concat(frames, ignore_index=True).reindex(columns=LOG_COLUMNS)
+    log['timestamp'] = pd.to_datetime(log['timestamp'])
+    return log.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+
+def slowest_patterns(log):
+    """Per search pattern: searches, slow searches, errors and p50/p95/max wall time, slowest p95 first"""
+    if log.empty:
+        return pd.DataFrame(columns=['pattern', 'searches', 'slow', 'errors', 'p50_ms', 'p95_ms', 'max_ms',
+                                     'avg_matches', 'last_seen'])
+    grouped = log.groupby('pattern')
+    summary = pd.DataFrame({
+        'searches': grouped.size(),
+        'slow': grouped['slow'].sum().astype(int),
+        'errors': grouped['error'].count(),
+        'p50_ms': grouped['wall_ms'].quantile(0.5).round(1),
+        'p95_ms': grouped['wall_ms'].quantile(0.95).round(1),
+        'max_ms': grouped['wall_ms'].max().round(1),
+        'avg_matches': grouped['matches'].mean().round(0),
+        'last_seen': grouped['timestamp'].max(),
+    })
+    return summary.sort_values('p95_ms', ascending=False).reset_index()
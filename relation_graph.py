@@ -0,0 +1,122 @@
+from name_normalize import house_number_sql, normalized_column
+from schema_catalog import ROW_ID_COLUMN
+
+# Name columns matched by the relation stage (their normalized companions are read)
+RELATION_NAME_COLUMNS = ['first_name', 'last_name', 'relation_first_name', 'relation_last_name']
+
+
+def relation_table_name(table_name):
+    """Name of the edge table linking voters to the relatives they name"""
+    return f"{table_name}_relations"
+
+
+def _relation_edges_select(table_name, where=""):
+    """SELECT of the relation edges between voters of table_name matching where (a WHERE clause)"""
+    return f"""
+        WITH people AS (
+            SELECT {ROW_ID_COLUMN} AS row_id,
+                   coalesce(CAST(locality AS VARCHAR), '') AS locality,
+                   {house_number_sql('house_number')} AS house_key,
+                   first_name_norm, last_name_norm,
+                   CAST(relation AS VARCHAR) AS relation,
+                   relation_first_name_norm, coalesce(relation_last_name_norm, '') AS relation_last_name_norm
+            FROM {table_name}
+            {where}
+        ),
+        household_edges AS (
+            SELECT p.row_id, r.row_id AS relative_row_id, p.relation, 'household' AS scope
+            FROM people p
+            JOIN people r
+              ON r.locality = p.locality
+             AND r.house_key = p.house_key
+             AND r.first_name_norm = p.relation_first_name_norm
+            WHERE p.house_key <> ''
+              AND p.relation_first_name_norm <> ''
+              AND r.row_id <> p.row_id
+              AND (p.relation_last_name_norm = '' OR r.last_name_norm = p.relation_last_name_norm)
+        ),
+        unique_names AS (
+            SELECT locality, first_name_norm, last_name_norm, any_value(row_id) AS row_id
+            FROM people
+            WHERE first_name_norm <> '' AND last_name_norm <> ''
+            GROUP BY ALL
+            HAVING COUNT(*) = 1
+        ),
+        locality_edges AS (
+            SELECT p.row_id, u.row_id AS relative_row_id, p.relation, 'locality' AS scope
+            FROM people p
+            JOIN unique_names u
+              ON u.locality = p.locality
+             AND u.first_name_norm = p.relation_first_name_norm
+             AND u.last_name_norm = p.relation_last_name_norm
+            WHERE u.row_id <> p.row_id
+              AND p.row_id NOT IN (SELECT row_id FROM household_edges)
+        )
+        SELECT * FROM household_edges
+        UNION ALL
+        SELECT * FROM locality_edges
+    """
+
+
+def build_relation_edges(con, table_name='Delhi_Voter'):
+    """
+    Resolve each voter's named relative to a voter row id
+
+    A voter's relation names (relation_first_name / relation_last_name) are
+    matched against the normalized names of other voters:
+
+    - in the same household (locality and normalized house number) first;
+    - otherwise in the same locality, but only when exactly one voter there
+      carries that full name, so a common name never produces a guess.
+
+    Writes {table_name}_relations(row_id, relative_row_id, relation, scope),
+    sorted by row_id, where relative_row_id is the voter's {relation} and
+    scope is 'household' or 'locality'.
+    """
+    columns = [row[0] for row in con.execute(f"DESCRIBE {table_name}").fetchall()]
+    relations = relation_table_name(table_name)
+    required = [ROW_ID_COLUMN, 'locality', 'house_number', 'relation'] + [
+        normalized_column(col) for col in RELATION_NAME_COLUMNS
+    ]
+    missing = [col for col in required if col not in columns]
+    if missing:
+        print(f"Missing columns {missing} in '{table_name}', skipping relation edges")
+        return 0
+
+    con.execute(f"""
+        CREATE OR REPLACE TABLE {relations} AS
+        {_relation_edges_select(table_name)}
+        ORDER BY row_id
+    """)
+
+    count, resolved = con.execute(f"SELECT COUNT(*), COUNT(DISTINCT row_id) FROM {relations}").fetchone()
+    print(f"Built relation edges '{relations}': {count} edges for {resolved} voters")
+    return count
+
+
+def refresh_relation_edges(con, localities, deleted_rows, table_name='Delhi_Voter'):
+    """
+    Recompute the relation edges of the given localities only
+
+    Edges never cross localities, so after an incremental load only the
+    edges of voters in the changed localities (and of the deleted rows,
+    listed by row_id in the deleted_rows table) are replaced. Falls back to
+    a full build when the edge table does not exist yet.
+    """
+    relations = relation_table_name(table_name)
+    exists = con.execute("SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [relations]).fetchone()[0] > 0
+    if not exists:
+        return build_relation_edges(con, table_name)
+
+    localities = sorted({locality or '' for locality in localities})
+    in_localities = "list_contains($localities, coalesce(CAST(locality AS VARCHAR), ''))"
+    con.execute(f"""
+        DELETE FROM {relations}
+        WHERE row_id IN (SELECT {ROW_ID_COLUMN} FROM {table_name} WHERE {in_localities})
+           OR row_id IN (SELECT row_id FROM {deleted_rows})
+           OR relative_row_id IN (SELECT row_id FROM {deleted_rows})
+    """, {'localities': localities})
+    con.execute(f"INSERT INTO {relations} {_relation_edges_select(table_name, f'WHERE {in_localities}')}",
+                {'localities': localities})
+    print(f"Refreshed relation edges of {len(localities)} localities in '{relations}'")
+    return len(localities)
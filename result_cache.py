@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pyarrow as pa
+
+from name_normalize import normalize_name
+
+
+def database_fingerprint(database_path):
+    """Identify a version of a database file (path, modification time, size)"""
+    if not database_path or not os.path.exists(database_path):
+        return (database_path, None, None)
+    stat = os.stat(database_path)
+    return (os.path.abspath(database_path), stat.st_mtime, stat.st_size)
+
+
+def search_cache_key(fingerprint, search_params, *page_key):
+    """
+    Cache key for one page of a search
+
+    Name terms are normalized, so 'Sharma ' and 'sharma' share an entry.
+    """
+    normalized = tuple(
+        (name, value if name == 'locality' else normalize_name(value))
+        for name, value in sorted(search_params.items())
+    )
+    return (fingerprint, normalized) + tuple(page_key)
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of result pages stored as Arrow tables
+
+    Entries expire after ttl seconds, and the least recently used entries
+    are evicted once the cached tables exceed max_bytes.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=600):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return (table, extra) for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key, table, extra=None):
+        """Store an Arrow table (plus any small picklable extra) under key"""
+        size = table.nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), table, extra, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[3]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit/miss counters and memory use"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def to_arrow(df):
+    """Compact Arrow copy of a result DataFrame for caching"""
+    return pa.Table.from_pandas(df, preserve_index=False)
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+# Rows pulled from DuckDB per Arrow record batch; bounds export memory
+EXPORT_BATCH_SIZE = 100_000
+EXPORT_MAX_AGE = 3600  # Seconds before a leftover export file is deleted
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def export_file_name(prefix='voter_search_results', file_format='csv'):
+    """Timestamped file name offered to the user for an export"""
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_format}"
+
+
+def export_path(directory, prefix='voter_search_results', file_format='csv'):
+    """Create a new, uniquely named export file in directory and return its path"""
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=f".{file_format}", prefix=f"{prefix}_", dir=directory)
+    os.close(fd)
+    return path
+
+
+def remove_old_exports(directory, max_age=EXPORT_MAX_AGE):
+    """Delete export files older than max_age seconds, returning how many were removed"""
+    if not os.path.isdir(directory):
+        return 0
+    removed = 0
+    cutoff = time.time() - max_age
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.rsplit('.', 1)[-1] in EXPORT_FORMATS and os.path.getmtime(path) < cutoff:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def export_query(conn, query, params, output_path, file_format='csv', batch_size=EXPORT_BATCH_SIZE):
+    """
+    Stream the result of a query into a CSV or Parquet file
+
+    Rows are fetched as Arrow record batches and written one batch at a time,
+    so memory use is bounded by batch_size regardless of the result size.
+
+    Parameters:
+    - conn: Open DuckDB connection
+    - query: SQL query producing the rows to export
+    - params: Query parameters
+    - output_path: File to write
+    - file_format: 'csv' or 'parquet'
+    - batch_size: Rows per record batch
+
+    Returns the number of rows written
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {file_format}")
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    reader = conn.execute(query, params).fetch_record_batch(batch_size)
+    writer_class = pa_csv.CSVWriter if file_format == 'csv' else pq.ParquetWriter
+
+    rows = 0
+    with writer_class(output_path, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
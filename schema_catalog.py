@@ -0,0 +1,122 @@
+import os
+import threading
+
+# Columns shown in the search results, in display order
+DISPLAY_COLUMNS = ['locality', 'house_number', 'first_name', 'last_name',
+                   'relation', 'relation_first_name', 'relation_last_name', 'gender']
+
+# Integer key assigned at ingest; DuckDB rowids are not stable inside transactions
+ROW_ID_COLUMN = 'row_id'
+
+# Low-cardinality columns stored as ENUMs (see voter_ingest.rewrite_voter_table)
+ENUM_COLUMNS = ['locality', 'gender', 'relation']
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def enum_type_name(column):
+    """Name of the ENUM type backing a dictionary-encoded column"""
+    return f"{column}_t"
+
+
+class SchemaCatalog:
+    """
+    Snapshot of the tables and columns of a DuckDB database
+
+    Built from a single catalog query, so callers can check for tables and
+    columns without issuing sqlite_master / PRAGMA queries on every search.
+    """
+
+    def __init__(self, table_columns, table_name, column_types=None):
+        self.table_columns = table_columns
+        self.table_name = table_name
+        self.column_types = column_types or {}
+
+    @property
+    def table_exists(self):
+        return self.table_name in self.table_columns
+
+    @property
+    def columns(self):
+        """Columns of the main table, in table order"""
+        return self.table_columns.get(self.table_name, [])
+
+    @property
+    def select_columns(self):
+        """Display columns available in the main table (all columns if none match)"""
+        selected = [col for col in DISPLAY_COLUMNS if col in self.columns]
+        return selected or list(self.columns)
+
+    @property
+    def select_clause(self):
+        return ", ".join(self.select_columns)
+
+    def has_table(self, name):
+        return name in self.table_columns
+
+    def has_column(self, column, table_name=None):
+        return column in self.table_columns.get(table_name or self.table_name, [])
+
+    def is_enum(self, column, table_name=None):
+        """Whether column is dictionary-encoded as an ENUM"""
+        return self.column_types.get((table_name or self.table_name, column), '').startswith('ENUM')
+
+    def value_sql(self, column, param_name):
+        """
+        Expression comparing equal to column for the bound parameter ${param_name}
+
+        For ENUM columns the parameter is cast to the enum, so the comparison
+        runs on dictionary codes instead of decoding every row to text.
+        """
+        if self.is_enum(column):
+            return f"TRY_CAST(${param_name} AS {enum_type_name(column)})"
+        return f"${param_name}"
+
+    @property
+    def row_key(self):
+        """Column that uniquely identifies a row (rowid for tables loaded without one)"""
+        return ROW_ID_COLUMN if self.has_column(ROW_ID_COLUMN) else 'rowid'
+
+
+def read_catalog(conn, table_name):
+    """Read the current schema of the database behind conn"""
+    rows = conn.execute("""
+        SELECT table_name, column_name, data_type
+        FROM duckdb_columns()
+        WHERE NOT internal
+          AND database_name = current_database()
+          AND schema_name = current_schema()
+        ORDER BY table_name, column_index
+    """).fetchall()
+
+    table_columns = {}
+    column_types = {}
+    for table, column, data_type in rows:
+        table_columns.setdefault(table, []).append(column)
+        column_types[(table, column)] = data_type
+    return SchemaCatalog(table_columns, table_name, column_types)
+
+
+def load_catalog(conn, database_path, table_name='Delhi_Voter'):
+    """
+    Return the schema catalog for database_path, resolving it at most once per file version
+
+    The catalog is cached on (path, modification time), so a rebuilt
+    database file is picked up on the next call. In-memory databases are
+    never cached.
+    """
+    if not database_path or database_path == ':memory:' or not os.path.exists(database_path):
+        return read_catalog(conn, table_name)
+
+    key = (os.path.abspath(database_path), os.path.getmtime(database_path), table_name)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+    if catalog is None:
+        catalog = read_catalog(conn, table_name)
+        with _catalogs_lock:
+            # Drop catalogs of older versions of the same file
+            for stale in [k for k in _catalogs if k[0] == key[0] and k[2] == table_name]:
+                del _catalogs[stale]
+            _catalogs[key] = catalog
+    return catalog
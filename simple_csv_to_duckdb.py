@@ -2,7 +2,9 @@ import duckdb
 import pandas as pd
 from pathlib import Path
 
-def csv_to_duckdb_simple(csv_folder_path, csv_filename, table_name='my_data'):
+from voter_ingest import prepare_voter_table
+
+def csv_to_duckdb_simple(csv_folder_path, csv_filename, table_name='my_data', database_path=':memory:', voter_table=False):
     """
     Simple function to read a CSV file from a folder into DuckDB
     
@@ -10,6 +12,8 @@ def csv_to_duckdb_simple(csv_folder_path, csv_filename, table_name='my_data'):
     - csv_folder_path: Path to the folder containing the CSV file
     - csv_filename: Name of the CSV file
     - table_name: Name for the table in DuckDB
+    - database_path: Path to DuckDB database file (use ':memory:' for in-memory)
+    - voter_table: Build the voter search structures (name index) after loading
     """
     
     # Construct full path to CSV file
@@ -21,8 +25,8 @@ def csv_to_duckdb_simple(csv_folder_path, csv_filename, table_name='my_data'):
         return None
     
     try:
-        # Connect to DuckDB (in-memory database)
-        con = duckdb.connect(':memory:')
+        # Connect to DuckDB (in-memory by default)
+        con = duckdb.connect(database_path)
         
         # Read CSV and create table
         con.execute(f"""
@@ -34,6 +38,9 @@ def csv_to_duckdb_simple(csv_folder_path, csv_filename, table_name='my_data'):
         count = con.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
         print(f"Successfully loaded {count} rows from {csv_filename} into table '{table_name}'")
         
+        if voter_table:
+            prepare_voter_table(con, table_name)
+        
         # Show first few rows
         print("\nFirst 3 rows:")
         result = con.execute(f"SELECT * FROM {table_name} LIMIT 3").fetchdf()
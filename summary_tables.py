@@ -0,0 +1,88 @@
+from name_suggest import name_table_name
+
+
+def locality_summary_name(table_name):
+    """Name of the table holding each locality with its row count"""
+    return f"{table_name}_localities"
+
+
+def totals_summary_name(table_name):
+    """Name of the one-row table of overall totals"""
+    return f"{table_name}_totals"
+
+
+def _build_totals(con, table_name, totals, unique_localities):
+    """(Re)create the one-row totals table; unique_localities is a SQL expression"""
+    has_names = con.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [name_table_name(table_name)]
+    ).fetchone()[0] > 0
+    unique_last_names = (f"(SELECT COUNT(*) FROM {name_table_name(table_name)} WHERE field = 'last_name')"
+                         if has_names else "CAST(NULL AS BIGINT)")
+
+    con.execute(f"""
+        CREATE OR REPLACE TABLE {totals} AS
+        SELECT (SELECT COUNT(*) FROM {table_name}) AS total_records,
+               {unique_localities} AS unique_localities,
+               {unique_last_names} AS unique_last_names
+    """)
+
+
+def build_summary_tables(con, table_name='Delhi_Voter'):
+    """
+    Materialize the summaries the search app reads at startup
+
+    - {table_name}_localities: locality, row_count (sorted by locality)
+    - {table_name}_totals: total_records, unique_localities, unique_last_names
+
+    Surname frequencies are the last_name rows of the distinct-name table
+    (name_suggest.build_name_table), so they are not stored twice.
+    """
+    columns = [row[0] for row in con.execute(f"DESCRIBE {table_name}").fetchall()]
+    localities = locality_summary_name(table_name)
+    totals = totals_summary_name(table_name)
+
+    if 'locality' in columns:
+        con.execute(f"""
+            CREATE OR REPLACE TABLE {localities} AS
+            SELECT coalesce(CAST(locality AS VARCHAR), '') AS locality, COUNT(*) AS row_count
+            FROM {table_name}
+            GROUP BY ALL
+            ORDER BY locality
+        """)
+        unique_localities = f"(SELECT COUNT(*) FROM {localities} WHERE locality <> '')"
+    else:
+        con.execute(f"DROP TABLE IF EXISTS {localities}")
+        unique_localities = "0"
+
+    _build_totals(con, table_name, totals, unique_localities)
+    print(f"Built summary tables '{localities}' and '{totals}'")
+
+
+def refresh_summary_tables(con, localities, table_name='Delhi_Voter'):
+    """
+    Recount the given localities in the locality summary and recompute the totals
+
+    The totals read the locality summary and the distinct-name table, so
+    refresh the name table first. Falls back to a full build when the
+    summaries do not exist yet.
+    """
+    locality_table = locality_summary_name(table_name)
+    exists = con.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [locality_table]
+    ).fetchone()[0] > 0
+    if not exists:
+        return build_summary_tables(con, table_name)
+
+    localities = [locality or '' for locality in localities]
+    con.execute(f"DELETE FROM {locality_table} WHERE list_contains($localities, locality)", {'localities': localities})
+    con.execute(f"""
+        INSERT INTO {locality_table}
+        SELECT coalesce(CAST(locality AS VARCHAR), '') AS locality, COUNT(*) AS row_count
+        FROM {table_name}
+        WHERE list_contains($localities, coalesce(CAST(locality AS VARCHAR), ''))
+        GROUP BY ALL
+        ORDER BY locality
+    """, {'localities': localities})
+    _build_totals(con, table_name, totals_summary_name(table_name),
+                  f"(SELECT COUNT(*) FROM {locality_table} WHERE locality <> '')")
+    print(f"Refreshed summary tables for {len(localities)} localities")
@@ -0,0 +1,267 @@
+from analytics import build_demographic_rollup, refresh_demographic_rollup
+from dedup import drop_duplicate_tables, remove_duplicate_rows
+from households import build_household_table, refresh_households
+from name_index import INDEXED_NAME_COLUMNS, build_trigram_index, update_trigram_index
+from name_normalize import normalized_column, normalized_expressions
+from name_suggest import build_name_table, refresh_name_table
+from phonetic import build_phonetic_index, update_phonetic_index
+from relation_graph import build_relation_edges, refresh_relation_edges
+from schema_catalog import ENUM_COLUMNS, ROW_ID_COLUMN, enum_type_name
+from summary_tables import build_summary_tables, refresh_summary_tables
+from voter_schema import TABLE_NAME, VOTER_ENUMS
+
+# Physical row order of the voter table; locality-scoped searches skip row groups of other localities
+CLUSTER_COLUMNS = ['locality', 'polling_area', 'last_name', 'first_name']
+
+
+def create_enum_types(con, table_name, columns):
+    """
+    (Re)create the ENUM type of each low-cardinality column from its observed values
+
+    Labels are sorted, so ordering by the enum matches ordering by the text.
+    Declared values (see voter_schema.VOTER_ENUMS) are always included, so
+    later strict loads cannot fail on a label that has not been seen yet.
+    NULL localities are stored as '' so the column can be sorted and
+    compared without COALESCE.
+
+    Returns {column: enum type name}
+    """
+    types = {}
+    for column in ENUM_COLUMNS:
+        if column not in columns:
+            continue
+        type_name = enum_type_name(column)
+        declared = " UNION ".join(f"SELECT '{value}'" for value in VOTER_ENUMS.get(type_name, []))
+        observed = f"SELECT DISTINCT coalesce(CAST({column} AS VARCHAR), '') FROM {table_name}"
+        if column != 'locality':
+            observed += f" WHERE {column} IS NOT NULL"
+        labels = f"{observed} UNION {declared}" if declared else observed
+        con.execute(f"CREATE OR REPLACE TYPE {type_name} AS ENUM (SELECT * FROM ({labels}) ORDER BY 1)")
+        types[column] = type_name
+    return types
+
+
+def encoded_expression(column, type_name):
+    """Expression casting a column to its ENUM type"""
+    if column == 'locality':
+        return f"CAST(coalesce(CAST({column} AS VARCHAR), '') AS {type_name})"
+    return f"CAST(CAST({column} AS VARCHAR) AS {type_name})"
+
+
+def decode_enum_columns(con, table_name=TABLE_NAME):
+    """
+    Turn ENUM columns back into VARCHAR before rows are added to table_name
+
+    New rows may carry labels the current enums do not have; the next
+    rewrite_voter_table re-encodes the columns from the updated values.
+    """
+    rows = con.execute(
+        "SELECT column_name FROM duckdb_columns() WHERE table_name = ? AND data_type LIKE 'ENUM%'",
+        [table_name]
+    ).fetchall()
+    for (column,) in rows:
+        if column in ENUM_COLUMNS:
+            con.execute(f"ALTER TABLE {table_name} ALTER {column} TYPE VARCHAR")
+
+
+def rewrite_voter_table(con, table_name=TABLE_NAME, cluster=True):
+    """
+    Rewrite table_name once with every derived column materialized
+
+    - locality, gender, relation: dictionary-encoded as ENUMs
+    - row_id: integer row key that the search structures refer to
+    - *_norm: normalized companion columns of the name and locality columns
+
+    With cluster, rows are written sorted by CLUSTER_COLUMNS so DuckDB's
+    per-row-group min/max zone maps can skip most of the table for a
+    locality filter, and row_id follows that order.
+
+    Derived columns from an earlier run are replaced, so the stage can be
+    re-run after rows are added or removed.
+    """
+    columns = [row[0] for row in con.execute(f"DESCRIBE {table_name}").fetchall()]
+    enum_types = create_enum_types(con, table_name, columns)
+    cluster_keys = [col for col in CLUSTER_COLUMNS if col in columns] if cluster else []
+    order = f"ORDER BY {', '.join(cluster_keys)}" if cluster_keys else ""
+    derived = {ROW_ID_COLUMN: f"row_number() OVER ({order})"}
+    derived.update(normalized_expressions(columns))
+
+    base_columns = [
+        f"{encoded_expression(col, enum_types[col])} AS {col}" if col in enum_types else col
+        for col in columns if col not in derived
+    ]
+    select_list = ", ".join(base_columns + [f"{expr} AS {name}" for name, expr in derived.items()])
+
+    con.execute(f"""
+        CREATE OR REPLACE TABLE {table_name} AS
+        SELECT {select_list}
+        FROM {table_name}
+        {f"ORDER BY {ROW_ID_COLUMN}" if cluster_keys else ""}
+    """)
+    print(f"Rewrote '{table_name}' with derived columns: {', '.join(derived)}; "
+          f"ENUM columns: {', '.join(enum_types) or 'none'}")
+    return list(derived)
+
+
+def prepare_voter_table(con, table_name=TABLE_NAME, cluster=True, changed_localities=None):
+    """
+    Build the search structures that live alongside a freshly loaded voter table
+
+    Run this after every (re)load of table_name, since the structures refer
+    to its row ids.
+
+    Parameters:
+    - con: Open read-write DuckDB connection
+    - table_name: Name of the loaded voter table
+    - cluster: Store rows sorted by CLUSTER_COLUMNS (see rewrite_voter_table)
+    - changed_localities: Localities whose rows changed since the last run; only their
+      demographic rollup rows are recomputed (None rebuilds the whole rollup)
+    """
+    print(f"Preparing search structures for '{table_name}'")
+    # Rewrites the table, so it must run before anything keyed on row ids
+    rewrite_voter_table(con, table_name, cluster)
+    build_trigram_index(con, table_name)
+    build_household_table(con, table_name)
+    build_relation_edges(con, table_name)
+    build_phonetic_index(con, table_name)
+    build_name_table(con, table_name)
+    # Reads the name table for its surname count
+    build_summary_tables(con, table_name)
+    if changed_localities is None:
+        build_demographic_rollup(con, table_name)
+    else:
+        refresh_demographic_rollup(con, changed_localities, table_name)
+    # Clusters refer to the old row ids; rerun dedup.py to rebuild them
+    drop_duplicate_tables(con, table_name)
+
+
+def can_append_rows(con, staging, table_name=TABLE_NAME):
+    """
+    Whether the rows of staging can be added to a prepared table_name without a rewrite
+
+    True when table_name already has row ids, staging brings no column the
+    table lacks, and every ENUM label in staging exists in the current enum
+    types (a new locality, for instance, needs the enums rebuilt).
+    """
+    types = dict(con.execute(
+        "SELECT column_name, data_type FROM duckdb_columns() WHERE table_name = ?", [table_name]
+    ).fetchall())
+    staging_columns = [row[0] for row in con.execute(f"DESCRIBE {staging}").fetchall()]
+    if ROW_ID_COLUMN not in types or any(col not in types for col in staging_columns):
+        return False
+    for column in ENUM_COLUMNS:
+        if column not in staging_columns or not types[column].startswith('ENUM'):
+            continue
+        value = f"coalesce(CAST({column} AS VARCHAR), '')" if column == 'locality' else f"CAST({column} AS VARCHAR)"
+        unknown = con.execute(f"""
+            SELECT COUNT(*) FROM (SELECT DISTINCT {value} AS label FROM {staging})
+            WHERE label IS NOT NULL AND NOT list_contains(enum_range(NULL::{enum_type_name(column)}), label)
+        """).fetchone()[0]
+        if unknown:
+            return False
+    return True
+
+
+def append_voter_rows(con, staging, stale_files, table_name=TABLE_NAME):
+    """
+    Replace the rows of stale_files in a prepared table_name with the rows of staging
+
+    Only the new rows are normalized and encoded; they get row ids after the
+    current maximum, so existing row ids stay valid. The search structures
+    are then updated for the changed rows and localities only. Check
+    can_append_rows first.
+
+    New rows are appended sorted by CLUSTER_COLUMNS but not merged into the
+    table's physical order, so locality pruning degrades slowly as loads
+    accumulate; run this module as a script to re-cluster. Deleted rows
+    leave the dedup results, added rows are only compared on the next
+    dedup.py run.
+
+    Parameters:
+    - con: Read-write DuckDB connection, inside the caller's transaction
+    - staging: Table of newly loaded rows with the raw CSV columns
+    - stale_files: source_file values whose rows are removed first
+    - table_name: Prepared voter table
+
+    Returns the affected localities
+    """
+    columns = [row[0] for row in con.execute(f"DESCRIBE {table_name}").fetchall()]
+    staging_columns = [row[0] for row in con.execute(f"DESCRIBE {staging}").fetchall()]
+    norm_columns = [col for col in columns if col.endswith('_norm')]
+    kept = ", ".join([ROW_ID_COLUMN, "coalesce(CAST(locality AS VARCHAR), '') AS locality"] + norm_columns)
+
+    # Read before the delete: new rows must never reuse the ids of the rows they replace,
+    # which the structures below drop as deleted
+    old_max = con.execute(f"SELECT coalesce(max({ROW_ID_COLUMN}), 0) FROM {table_name}").fetchone()[0]
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE ingest_deleted AS
+        SELECT {kept} FROM {table_name} WHERE list_contains(?, source_file)
+    """, [list(stale_files)])
+    con.execute(f"DELETE FROM {table_name} WHERE list_contains(?, source_file)", [list(stale_files)])
+
+    cluster_keys = [col for col in CLUSTER_COLUMNS if col in staging_columns]
+    order = f"ORDER BY {', '.join(cluster_keys)}" if cluster_keys else ""
+    derived = {ROW_ID_COLUMN: f"{old_max} + row_number() OVER ({order})"}
+    derived.update({name: expr for name, expr in normalized_expressions(staging_columns).items() if name in columns})
+    base_columns = [
+        encoded_expression(col, enum_type_name(col)) + f" AS {col}"
+        if col in ENUM_COLUMNS and col in columns else col
+        for col in staging_columns
+    ]
+    select_list = ", ".join(base_columns + [f"{expr} AS {name}" for name, expr in derived.items()])
+    con.execute(f"""
+        INSERT INTO {table_name} BY NAME
+        SELECT * FROM (SELECT {select_list} FROM {staging})
+        ORDER BY {ROW_ID_COLUMN}
+    """)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE ingest_inserted AS
+        SELECT {kept} FROM {table_name} WHERE {ROW_ID_COLUMN} > {old_max}
+    """)
+
+    localities = [row[0] for row in con.execute(
+        "SELECT locality FROM ingest_deleted UNION SELECT locality FROM ingest_inserted"
+    ).fetchall()]
+    name_fields = [col for col in INDEXED_NAME_COLUMNS if normalized_column(col) in norm_columns]
+    changed_names = " UNION ".join(
+        f"SELECT '{field}' AS field, {normalized_column(field)} AS name FROM {rows}"
+        for field in name_fields for rows in ('ingest_deleted', 'ingest_inserted')
+    ) or "SELECT NULL::VARCHAR AS field, NULL::VARCHAR AS name WHERE false"
+    con.execute(f"CREATE OR REPLACE TEMP TABLE ingest_names AS {changed_names}")
+
+    inserted, deleted = con.execute(
+        "SELECT (SELECT COUNT(*) FROM ingest_inserted), (SELECT COUNT(*) FROM ingest_deleted)"
+    ).fetchone()
+    print(f"Appended {inserted} rows to '{table_name}' and removed {deleted}")
+    update_trigram_index(con, 'ingest_deleted', 'ingest_inserted', table_name)
+    refresh_households(con, localities, table_name)
+    refresh_relation_edges(con, localities, 'ingest_deleted', table_name)
+    update_phonetic_index(con, 'ingest_names', table_name)
+    refresh_name_table(con, 'ingest_names', table_name)
+    # Reads the name table for its surname count
+    refresh_summary_tables(con, localities, table_name)
+    refresh_demographic_rollup(con, localities, table_name)
+    remove_duplicate_rows(con, 'ingest_deleted', table_name)
+
+    for temp in ('ingest_deleted', 'ingest_inserted', 'ingest_names'):
+        con.execute(f"DROP TABLE {temp}")
+    return localities
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import duckdb
+
+    parser = argparse.ArgumentParser(
+        description="Re-cluster the voter table and rebuild its search structures "
+                    "(run after bulk changes made outside the loaders)")
+    parser.add_argument("database", nargs="?", default="voter_data.duckdb", help="DuckDB database file")
+    parser.add_argument("--table", default=TABLE_NAME, help="Voter table to rebuild")
+    parser.add_argument("--no-cluster", action="store_true", help="Keep the current row order")
+    args = parser.parse_args()
+
+    con = duckdb.connect(args.database)
+    prepare_voter_table(con, args.table, cluster=not args.no_cluster)
+    con.execute("CHECKPOINT")
+    con.close()
@@ -0,0 +1,313 @@
+from analytics import age_distribution
+from dedup import duplicates_table_name
+from households import household_table_name
+from name_index import term_trigrams, trigram_condition, trigram_index_name
+from name_normalize import house_number_sql, normalize_house_number, normalize_name, normalized_column, prefix_range
+from phonetic import PHONETIC_MAX_DISTANCE, distance_sql, phonetic_condition, phonetic_index_name, term_keys
+from relation_graph import relation_table_name
+from schema_catalog import read_catalog
+from summary_tables import locality_summary_name
+from voter_schema import TABLE_NAME
+
+
+class VoterQueries:
+    """
+    Parameterized voter queries bound to one DuckDB connection
+
+    Shared by the search app and the notebook helpers in Query_function.py.
+    Every user-supplied value is bound as a statement parameter; only
+    identifiers from the schema catalog are written into the SQL text, so
+    each query shape always produces the same statement.
+
+    Parameters:
+    - conn: DuckDB connection or cursor
+    - table_name: Voter table to query
+    - catalog: SchemaCatalog of table_name (read from conn when None)
+    """
+
+    def __init__(self, conn, table_name=TABLE_NAME, catalog=None):
+        self.conn = conn
+        self.table_name = table_name
+        self.catalog = catalog if catalog is not None else read_catalog(conn, table_name)
+
+    def search_filter(self, first_name=None, last_name=None, locality=None,
+                      relation_first_name=None, relation_last_name=None, match_mode='contains',
+                      house_number=None, duplicates_only=False):
+        """
+        Build the WHERE clause and parameters for a person search (None if no criteria)
+
+        match_mode is 'prefix' for names starting with the search term, 'contains' for
+        substring matches or 'phonetic' for names that sound like the search term (see
+        phonetic.py). Prefix matches are range predicates on the normalized columns,
+        which follow the clustered row order. Phonetic matches are bounded by
+        PHONETIC_MAX_DISTANCE edits and bind each term as ${field}_term for ranking.
+        duplicates_only keeps rows that dedup.py placed in a duplicate cluster.
+        """
+        catalog = self.catalog
+        conditions = []
+        params = {}
+        use_index = catalog.has_table(trigram_index_name(self.table_name))
+        use_phonetic = match_mode == 'phonetic' and catalog.has_table(phonetic_index_name(self.table_name))
+
+        def add_name_condition(field, value):
+            """Add a prefix, phonetic or substring match on a name field, narrowed by an index when possible"""
+            if not (value and value.strip()):
+                return
+            keys = term_keys(value) if use_phonetic and catalog.has_column(normalized_column(field)) else []
+            if keys:
+                conditions.append(phonetic_condition(field, f"{field}_keys", self.table_name))
+                conditions.append(f"{distance_sql(field, f'{field}_term')} <= {PHONETIC_MAX_DISTANCE}")
+                params[f"{field}_keys"] = keys
+                params[f"{field}_term"] = normalize_name(value)
+                return
+            if match_mode == 'prefix':
+                low, high = prefix_range(value)
+                if catalog.has_column(normalized_column(field)):
+                    # Range over sorted strings, so min/max zone maps can skip row groups
+                    conditions.append(f"{normalized_column(field)} >= ${field}_low AND {normalized_column(field)} < ${field}_high")
+                    params[f"{field}_low"] = low
+                    params[f"{field}_high"] = high
+                else:
+                    conditions.append(f"LOWER({field}) LIKE LOWER(${field})")
+                    params[field] = f"{value.strip()}%"
+                return
+            trigrams = term_trigrams(value) if use_index else []
+            if trigrams:
+                conditions.append(trigram_condition(field, f"{field}_trigrams", self.table_name, catalog.row_key))
+                params[f"{field}_trigrams"] = trigrams
+            if catalog.has_column(normalized_column(field)):
+                # Normalized at ingest, so only the search term needs normalizing
+                conditions.append(f"{normalized_column(field)} LIKE ${field}")
+                params[field] = f"%{normalize_name(value)}%"
+            else:
+                conditions.append(f"LOWER({field}) LIKE LOWER(${field})")
+                params[field] = f"%{value.strip()}%"
+
+        add_name_condition('first_name', first_name)
+        add_name_condition('last_name', last_name)
+
+        if locality and locality != "All":
+            conditions.append(f"locality = {catalog.value_sql('locality', 'locality')}")
+            params['locality'] = locality
+
+        if house_number and normalize_house_number(house_number):
+            households = household_table_name(self.table_name)
+            if catalog.has_table(households):
+                # Members listed in the household table instead of normalizing every row
+                same_locality = " AND locality = $locality" if 'locality' in params else ""
+                conditions.append(f"{catalog.row_key} IN (SELECT unnest(row_ids) FROM {households} "
+                                  f"WHERE house_key = $house_number{same_locality})")
+            else:
+                conditions.append(f"{house_number_sql('house_number')} = $house_number")
+            params['house_number'] = normalize_house_number(house_number)
+
+        add_name_condition('relation_first_name', relation_first_name)
+        add_name_condition('relation_last_name', relation_last_name)
+
+        duplicates = duplicates_table_name(self.table_name)
+        if duplicates_only and catalog.has_table(duplicates):
+            conditions.append(f"{catalog.row_key} IN (SELECT row_id FROM {duplicates} "
+                              f"WHERE cluster_size >= $min_cluster_size)")
+            params['min_cluster_size'] = 2
+
+        if not conditions:
+            return None, {}
+        return " AND ".join(conditions), params
+
+    def sort_keys(self, params=None):
+        """
+        Unique, stable sort key for results: locality, house number, then row key
+
+        For a phonetic search (params from search_filter) the total edit
+        distance to the search terms comes first, so the closest spellings lead.
+        A duplicates-only search sorts by cluster first, so the records of one
+        voter are listed together.
+        """
+        catalog = self.catalog
+        keys = []
+        if 'min_cluster_size' in (params or {}):
+            keys.append(f"(SELECT cluster_id FROM {duplicates_table_name(self.table_name)} d "
+                        f"WHERE d.row_id = {self.table_name}.{catalog.row_key})")
+        distances = [distance_sql(name[:-len('_term')], name) for name in (params or {}) if name.endswith('_term')]
+        if distances:
+            keys.append(f"({' + '.join(distances)})")
+        if catalog.is_enum('locality'):
+            # Encoded at ingest with NULL stored as '', so it sorts on dictionary codes
+            keys.append("locality")
+        elif catalog.has_column('locality'):
+            keys.append("coalesce(locality, '')")
+        if catalog.has_column('house_number'):
+            keys.append("coalesce(CAST(house_number AS VARCHAR), '')")
+        keys.append(catalog.row_key)
+        return keys
+
+    def summary_count(self, params):
+        """Match count of a locality-only search from the locality summary, or None"""
+        summary = locality_summary_name(self.table_name)
+        if set(params) != {'locality'} or not self.catalog.has_table(summary):
+            return None
+        result = self.conn.execute(f"SELECT row_count FROM {summary} WHERE locality = $locality", params).fetchone()
+        return result[0] if result else 0
+
+    def count(self, where_clause, params):
+        """Number of rows matching a search filter"""
+        total_count = self.summary_count(params)
+        if total_count is None:
+            query = f"SELECT COUNT(*) FROM {self.table_name} WHERE {where_clause}"
+            total_count = self.conn.execute(query, params).fetchone()[0]
+        return total_count
+
+    def page_query(self, where_clause, params):
+        """Statement behind search_page, binding $limit and $offset besides params"""
+        return f"""
+        SELECT {self.catalog.select_clause}
+        FROM {self.table_name}
+        WHERE {where_clause}
+        ORDER BY {", ".join(self.sort_keys(params))}
+        LIMIT $limit OFFSET $offset
+        """
+
+    def search_page(self, where_clause, params, offset=0, limit=20):
+        """One page of matching rows (display columns), in sort_keys order"""
+        query = self.page_query(where_clause, params)
+        return self.conn.execute(query, dict(params, limit=limit, offset=offset)).fetchdf()
+
+    def household(self, locality, house_number):
+        """
+        Everyone registered at one house of a locality
+
+        House numbers are compared normalized, so 'H.No. 12-A' finds '12/A'.
+        Returns (members DataFrame, member count).
+        """
+        params = {'locality': locality or '', 'house_key': normalize_house_number(house_number)}
+        households = household_table_name(self.table_name)
+        if self.catalog.has_table(households):
+            row = self.conn.execute(f"""
+                SELECT members, row_ids FROM {households}
+                WHERE locality = $locality AND house_key = $house_key
+            """, params).fetchone()
+            if row is None:
+                return self.conn.execute(f"SELECT {self.catalog.select_clause} FROM {self.table_name} LIMIT 0").fetchdf(), 0
+            members, row_ids = row
+            query = f"""
+            SELECT {self.catalog.select_clause}
+            FROM {self.table_name}
+            WHERE {self.catalog.row_key} BETWEEN $first AND $last AND list_contains($row_ids, {self.catalog.row_key})
+            ORDER BY {self.catalog.row_key}
+            """
+            # Row ids follow the clustered order, so the range check skips most row groups
+            result = self.conn.execute(query, {'first': row_ids[0], 'last': row_ids[-1], 'row_ids': row_ids}).fetchdf()
+            return result, members
+
+        query = f"""
+        SELECT {self.catalog.select_clause}
+        FROM {self.table_name}
+        WHERE coalesce(CAST(locality AS VARCHAR), '') = $locality AND {house_number_sql('house_number')} = $house_key
+        ORDER BY {", ".join(self.sort_keys())}
+        """
+        result = self.conn.execute(query, params).fetchdf()
+        return result, len(result)
+
+    def household_size(self, locality, house_number):
+        """
+        Number of voters registered at one house of a locality
+
+        Reads only the members column of the household table, without
+        fetching the members themselves.
+        """
+        params = {'locality': locality or '', 'house_key': normalize_house_number(house_number)}
+        households = household_table_name(self.table_name)
+        if self.catalog.has_table(households):
+            row = self.conn.execute(f"""
+                SELECT members FROM {households}
+                WHERE locality = $locality AND house_key = $house_key
+            """, params).fetchone()
+            return row[0] if row else 0
+
+        return self.conn.execute(f"""
+            SELECT COUNT(*) FROM {self.table_name}
+            WHERE coalesce(CAST(locality AS VARCHAR), '') = $locality AND {house_number_sql('house_number')} = $house_key
+        """, params).fetchone()[0]
+
+    def family(self, row_id):
+        """
+        A voter and the relatives linked to them in the relation edge table
+
+        Each row carries a link column relative to the voter: 'Self', the
+        relation they named (e.g. 'Father'), 'Child' / 'Spouse' / 'Dependent'
+        for voters who named them, or 'Sibling' for voters naming the same
+        parent. Returns an empty DataFrame if the edge table is missing.
+        """
+        relations = relation_table_name(self.table_name)
+        if not self.catalog.has_table(relations):
+            return self.conn.execute(f"SELECT {self.catalog.select_clause} FROM {self.table_name} LIMIT 0").fetchdf()
+
+        query = f"""
+        WITH links AS (
+            SELECT relative_row_id AS row_id, relation AS link, scope
+            FROM {relations} WHERE row_id = $row_id
+            UNION ALL
+            SELECT row_id,
+                   CASE WHEN relation IN ('Father', 'Mother') THEN 'Child'
+                        WHEN relation IN ('Husband', 'Wife') THEN 'Spouse'
+                        ELSE 'Dependent' END,
+                   scope
+            FROM {relations} WHERE relative_row_id = $row_id
+            UNION ALL
+            SELECT sibling.row_id, 'Sibling', sibling.scope
+            FROM {relations} parent
+            JOIN {relations} sibling
+              ON sibling.relative_row_id = parent.relative_row_id AND sibling.relation = parent.relation
+            WHERE parent.row_id = $row_id AND parent.relation IN ('Father', 'Mother')
+              AND sibling.row_id <> $row_id
+        ),
+        family AS (
+            SELECT $row_id AS row_id, 'Self' AS link, NULL AS scope
+            UNION ALL
+            SELECT row_id, string_agg(DISTINCT link, ', ' ORDER BY link), min(scope)
+            FROM links WHERE row_id <> $row_id
+            GROUP BY row_id
+        )
+        SELECT family.link, family.scope, {self.catalog.select_clause}
+        FROM family
+        JOIN {self.table_name} voter ON voter.{self.catalog.row_key} = family.row_id
+        ORDER BY family.link <> 'Self', family.link, family.row_id
+        """
+        return self.conn.execute(query, {'row_id': row_id}).fetchdf()
+
+    def query_by_locality(self, locality_name):
+        """Records whose locality contains locality_name"""
+        if self.catalog.has_column(normalized_column('locality')):
+            condition = f"{normalized_column('locality')} LIKE $locality"
+            pattern = f"%{normalize_name(locality_name)}%"
+        else:
+            condition = "LOWER(CAST(locality AS VARCHAR)) LIKE LOWER($locality)"
+            pattern = f"%{locality_name}%"
+        query = f"""
+        SELECT locality, polling_area, first_name, last_name, age, gender
+        FROM {self.table_name}
+        WHERE {condition}
+        ORDER BY last_name, first_name
+        """
+        return self.conn.execute(query, {'locality': pattern}).fetchdf()
+
+    def age_distribution(self, locality=None, polling_area=None):
+        """Voters per age band (see analytics.age_distribution)"""
+        return age_distribution(self.conn, locality, polling_area, self.table_name)
+
+    def search_person(self, first_name=None, last_name=None, house_number=None, match_mode='contains'):
+        """
+        All records matching a person's name and/or house number
+
+        Returns None if no search parameter is given.
+        """
+        where_clause, params = self.search_filter(first_name, last_name, match_mode=match_mode,
+                                                  house_number=house_number)
+        if not where_clause:
+            return None
+        query = f"""
+        SELECT * FROM {self.table_name}
+        WHERE {where_clause}
+        ORDER BY locality, polling_area, last_name, first_name
+        """
+        return self.conn.execute(query, params).fetchdf()
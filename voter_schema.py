@@ -0,0 +1,102 @@
+from schema_catalog import enum_type_name
+
+TABLE_NAME = "Delhi_Voter"
+
+GENDER_VALUES = ['M', 'F', 'O']
+RELATION_VALUES = ['Father', 'Mother', 'Husband', 'Wife', 'Other']
+
+# ENUM types created in the database before a strict load
+VOTER_ENUMS = {
+    enum_type_name('gender'): GENDER_VALUES,
+    enum_type_name('relation'): RELATION_VALUES,
+}
+
+# Declared layout of the voter roll CSV files, in file column order
+VOTER_COLUMNS = {
+    'locality': 'VARCHAR',
+    'polling_area': 'VARCHAR',
+    'house_number': 'VARCHAR',
+    'first_name': 'VARCHAR',
+    'last_name': 'VARCHAR',
+    'relation': enum_type_name('relation'),
+    'relation_first_name': 'VARCHAR',
+    'relation_last_name': 'VARCHAR',
+    'gender': enum_type_name('gender'),
+    'age': 'UTINYINT',
+}
+
+
+def rejects_table_name(table_name):
+    """Name of the side table holding rows rejected by a strict load"""
+    return f"{table_name}_rejects"
+
+
+def create_voter_types(con):
+    """Create the ENUM types used by VOTER_COLUMNS if they do not exist yet"""
+    existing = {row[0] for row in con.execute("SELECT type_name FROM duckdb_types() WHERE NOT internal").fetchall()}
+    for type_name, values in VOTER_ENUMS.items():
+        if type_name not in existing:
+            labels = ", ".join("'" + value.replace("'", "''") + "'" for value in values)
+            con.execute(f"CREATE TYPE {type_name} AS ENUM ({labels})")
+
+
+def check_header(csv_path):
+    """Raise ValueError if a CSV header does not match the declared column order"""
+    with open(csv_path, encoding='utf-8-sig') as f:
+        header = [name.strip() for name in f.readline().strip().split(',')]
+    if header != list(VOTER_COLUMNS):
+        raise ValueError(f"{csv_path}: header {header} does not match declared columns {list(VOTER_COLUMNS)}")
+
+
+def strict_csv_sql(csv_files, scan_name='voter_scan'):
+    """
+    SELECT reading csv_files with the declared schema and no type sniffing
+
+    Rows that fail to parse or convert are kept in the temporary tables
+    {scan_name}_errors / {scan_name}_files instead of aborting the load.
+    """
+    file_list = ", ".join(f"'{csv_file}'" for csv_file in csv_files)
+    columns = ", ".join(f"'{name}': '{column_type}'" for name, column_type in VOTER_COLUMNS.items())
+    return f"""
+        SELECT * EXCLUDE (filename), filename AS source_file
+        FROM read_csv(
+            [{file_list}],
+            header=true,
+            auto_detect=false,
+            delim=',',
+            quote='"',
+            columns={{{columns}}},
+            filename=true,
+            store_rejects=true,
+            rejects_table='{scan_name}_errors',
+            rejects_scan='{scan_name}_files'
+        )
+    """
+
+
+def save_rejects(con, table_name, scan_name='voter_scan'):
+    """
+    Append the rejected rows of the last strict load to the rejects side table
+
+    Returns the number of rejected rows
+    """
+    rejects = rejects_table_name(table_name)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {rejects} (
+            source_file VARCHAR, line BIGINT, column_name VARCHAR,
+            error_type VARCHAR, csv_line VARCHAR, error_message VARCHAR,
+            rejected_at TIMESTAMP
+        )
+    """)
+    rejected = con.execute(f"""
+        INSERT INTO {rejects}
+        SELECT s.file_path, e.line, e.column_name, CAST(e.error_type AS VARCHAR),
+               e.csv_line, e.error_message, now()
+        FROM {scan_name}_errors e
+        JOIN {scan_name}_files s USING (scan_id, file_id)
+    """).fetchone()[0]
+
+    # The scan tables are session-wide; clear them so the next load starts empty
+    con.execute(f"DROP TABLE IF EXISTS {scan_name}_errors")
+    con.execute(f"DROP TABLE IF EXISTS {scan_name}_files")
+    return rejected
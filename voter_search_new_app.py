@@ -1,9 +1,21 @@
 import streamlit as st
-import duckdb
 import pandas as pd
 import os
 import math
-from datetime import datetime
+import queue
+from contextlib import contextmanager
+
+from analytics import age_distribution, gender_by_age, locality_breakdown, polling_areas, rollup_table_name
+from dedup import duplicates_table_name
+from name_suggest import name_table_name, suggest_names
+from query_profile import QueryProfiler, SLOW_QUERY_MS, read_query_log, search_pattern, slowest_patterns
+from relation_graph import relation_table_name
+from schema_catalog import enum_type_name, load_catalog
+from summary_tables import locality_summary_name, totals_summary_name
+from voter_queries import VoterQueries
+from connection_pool import ConnectionPool, DEFAULT_POOL_SIZE
+from result_cache import ResultCache, database_fingerprint, search_cache_key, to_arrow
+from result_export import EXPORT_FORMATS, export_file_name, export_path, export_query, remove_old_exports
 
 # Page configuration
 st.set_page_config(
@@ -125,8 +137,20 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Database configuration
-DUCKDB_PATH = "voter_data.duckdb"
+# Point VOTER_DB_PATH at a views database to serve the partitioned Parquet backend (parquet_backend.py)
+DUCKDB_PATH = os.environ.get("VOTER_DB_PATH", "voter_data.duckdb")
 TABLE_NAME = "Delhi_Voter"
+EXPORT_DIR = "exports"
+DB_POOL_SIZE = DEFAULT_POOL_SIZE  # Concurrent cursors shared by all sessions (VOTER_DB_POOL_SIZE)
+DB_WAIT_TIMEOUT = float(os.environ.get("VOTER_DB_WAIT", "5"))  # Seconds a query waits for a free cursor before "server busy"
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Memory ceiling for cached result pages
+RESULT_CACHE_TTL = 600  # Seconds a cached page stays valid
+ROW_KEY_ALIAS = "_row_key"  # Hidden results column linking a row to its family
+QUERY_LOG_PATH = os.environ.get("VOTER_QUERY_LOG", "query_log.jsonl") or None  # Rotating log of search timings (query_profile.py); '' turns it off
+SLOW_SEARCH_MS = os.environ.get("VOTER_SLOW_QUERY_MS", str(SLOW_QUERY_MS))  # Searches slower than this are profiled; '' or 'off' only logs timings
+SLOW_SEARCH_MS = float(SLOW_SEARCH_MS) if SLOW_SEARCH_MS not in ("", "off") else None
+SHOW_QUERY_PANEL = os.environ.get("VOTER_ADMIN_PANEL") == "1"  # Show the Query Performance admin tab
+MATCH_MODES = {"Starts with": "prefix", "Contains": "contains", "Sounds like": "phonetic"}  # Name matching options in the search form, default first
 
 # Initialize session state for pagination
 if 'page_number' not in st.session_state:
@@ -137,41 +161,85 @@ if 'search_results' not in st.session_state:
     st.session_state.search_results = pd.DataFrame()
 if 'total_results' not in st.session_state:
     st.session_state.total_results = 0
+if 'page_seek' not in st.session_state:
+    st.session_state.page_seek = None  # Keyset cursor for the page being shown
+if 'page_keys' not in st.session_state:
+    st.session_state.page_keys = (None, None)  # First and last sort key of the current page
 
 @st.cache_resource
 def init_database():
-    """Initialize database connection"""
+    """Initialize the database connection pool shared by all sessions"""
     if not os.path.exists(DUCKDB_PATH):
         st.error(f"Database file '{DUCKDB_PATH}' not found. Please run the CSV to DuckDB notebook first.")
         st.stop()
     
     try:
-        conn = duckdb.connect(DUCKDB_PATH, read_only=True)
-        return conn
+        return ConnectionPool(DUCKDB_PATH, DB_POOL_SIZE, read_only=True)
     except Exception as e:
         try:
-            conn = duckdb.connect(DUCKDB_PATH)
-            return conn
+            return ConnectionPool(DUCKDB_PATH, DB_POOL_SIZE, read_only=False)
         except Exception as e2:
             st.error(f"Failed to connect to database: {e2}")
             st.error("Please close any other applications using the database file.")
             st.stop()
 
+@contextmanager
+def db_connection(pool):
+    """
+    Borrow a pooled cursor for one query or block of queries
+
+    Cursors go back to the pool as soon as the block ends, never at the end
+    of the script run. If none frees up within DB_WAIT_TIMEOUT seconds the
+    user is told the server is busy and the run stops.
+    """
+    try:
+        with pool.connection(timeout=DB_WAIT_TIMEOUT) as conn:
+            yield conn
+    except queue.Empty:
+        st.warning("⏳ The server is busy right now. Please try again in a moment.")
+        st.stop()
+
+@st.cache_resource
+def get_query_profiler():
+    """Search timing log shared by all sessions; slow searches are profiled on pooled cursors"""
+    if not QUERY_LOG_PATH:
+        return QueryProfiler(None)
+    return QueryProfiler(QUERY_LOG_PATH, SLOW_SEARCH_MS, pool=init_database())
+
+@st.cache_resource
+def get_result_cache():
+    """Result page cache shared by all sessions"""
+    return ResultCache(RESULT_CACHE_MAX_BYTES, RESULT_CACHE_TTL)
+
+def get_catalog(conn):
+    """Schema of the voter database, resolved once per database file version"""
+    return load_catalog(conn, DUCKDB_PATH, TABLE_NAME)
+
+def get_queries(conn):
+    """Parameterized voter queries on conn, sharing the cached catalog"""
+    return VoterQueries(conn, TABLE_NAME, get_catalog(conn))
+
 @st.cache_data
 def load_localities(_conn):
     """Load all unique localities for dropdown"""
     try:
-        table_check = _conn.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{TABLE_NAME}'").fetchone()
-        if not table_check:
+        catalog = get_catalog(_conn)
+        if not catalog.table_exists:
             st.error(f"Table '{TABLE_NAME}' not found in database")
             return []
         
-        columns = _conn.execute(f"PRAGMA table_info({TABLE_NAME})").fetchdf()
-        if 'locality' not in columns['name'].values:
+        if not catalog.has_column('locality'):
             st.error("Column 'locality' not found in table")
             return []
         
-        query = f"SELECT DISTINCT locality FROM {TABLE_NAME} WHERE locality IS NOT NULL AND locality != '' ORDER BY locality"
+        if catalog.has_table(locality_summary_name(TABLE_NAME)):
+            # Materialized at ingest, one row per locality
+            query = f"SELECT locality FROM {locality_summary_name(TABLE_NAME)} WHERE locality != '' ORDER BY locality"
+        elif catalog.is_enum('locality'):
+            # The enum holds exactly the observed localities, already sorted
+            query = f"SELECT unnest(enum_range(NULL::{enum_type_name('locality')}))"
+        else:
+            query = f"SELECT DISTINCT locality FROM {TABLE_NAME} WHERE locality IS NOT NULL AND locality != '' ORDER BY locality"
         result = _conn.execute(query).fetchall()
         localities = [row[0] for row in result if row[0]]
         return localities
@@ -184,17 +252,21 @@ def get_database_stats(_conn):
     """Get basic database statistics"""
     try:
         stats = {}
-        table_check = _conn.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{TABLE_NAME}'").fetchone()
-        if not table_check:
+        catalog = get_catalog(_conn)
+        if not catalog.table_exists:
             return {}
         
-        columns = _conn.execute(f"PRAGMA table_info({TABLE_NAME})").fetchdf()
-        column_names = columns['name'].values
+        if catalog.has_table(totals_summary_name(TABLE_NAME)):
+            # Materialized at ingest, so startup does not scan the voter table
+            result = _conn.execute(
+                f"SELECT total_records, unique_localities FROM {totals_summary_name(TABLE_NAME)}"
+            ).fetchone()
+            return {'total_records': result[0], 'unique_localities': result[1]}
         
         result = _conn.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}").fetchone()
         stats['total_records'] = result[0]
         
-        if 'locality' in column_names:
+        if catalog.has_column('locality'):
             result = _conn.execute(f"SELECT COUNT(DISTINCT locality) FROM {TABLE_NAME} WHERE locality IS NOT NULL").fetchone()
             stats['unique_localities'] = result[0]
         else:
@@ -205,76 +277,264 @@ def get_database_stats(_conn):
         st.error(f"Failed to get database stats: {e}")
         return {}
 
+def apply_suggestion(field):
+    """Copy the picked suggestion into the search form field"""
+    picked = st.session_state.get('suggest_pick')
+    if picked:
+        st.session_state[f"{field}_input"] = picked
+        st.session_state.suggest_applied = True
+
+@st.fragment
+def render_name_suggest(pool):
+    """Live name suggestions; reruns only this fragment, not the whole page"""
+    field_labels = {"First Name": "first_name", "Last Name": "last_name"}
+    label = st.radio("Suggest", options=list(field_labels), horizontal=True, key="suggest_field")
+    field = field_labels[label]
+    prefix = st.text_input(
+        "Name starts with",
+        placeholder="Type the start of a name...",
+        key="suggest_prefix",
+        help="Suggestions come from the distinct-name table; pick one to fill the search form"
+    )
+    
+    if st.session_state.pop('suggest_applied', False):
+        # Rerun the whole page so the form shows the picked name
+        st.rerun()
+    
+    if prefix and prefix.strip():
+        with db_connection(pool) as conn:
+            names = suggest_names(conn, field, prefix, TABLE_NAME)
+        if names:
+            st.radio("Suggestions", names, index=None, horizontal=True, key="suggest_pick",
+                     on_change=apply_suggestion, args=(field,), label_visibility="collapsed")
+        else:
+            st.caption("No names start with that.")
+
 def search_persons_paginated(conn, first_name=None, last_name=None, locality=None, 
                            relation_first_name=None, relation_last_name=None, 
-                           offset=0, limit=20):
+                           offset=0, limit=20, match_mode='contains', house_number=None,
+                           duplicates_only=False):
     """Search for persons with pagination"""
-    conditions = []
-    params = {}
-    
-    if first_name and first_name.strip():
-        conditions.append("LOWER(first_name) LIKE LOWER($first_name)")
-        params['first_name'] = f"%{first_name.strip()}%"
-    
-    if last_name and last_name.strip():
-        conditions.append("LOWER(last_name) LIKE LOWER($last_name)")
-        params['last_name'] = f"%{last_name.strip()}%"
-    
-    if locality and locality != "All":
-        conditions.append("locality = $locality")
-        params['locality'] = locality
-    
-    if relation_first_name and relation_first_name.strip():
-        conditions.append("LOWER(relation_first_name) LIKE LOWER($relation_first_name)")
-        params['relation_first_name'] = f"%{relation_first_name.strip()}%"
-    
-    if relation_last_name and relation_last_name.strip():
-        conditions.append("LOWER(relation_last_name) LIKE LOWER($relation_last_name)")
-        params['relation_last_name'] = f"%{relation_last_name.strip()}%"
-    
-    if not conditions:
+    try:
+        queries = get_queries(conn)
+        if not queries.catalog.table_exists:
+            st.error(f"Table '{TABLE_NAME}' not found in database")
+            return pd.DataFrame(), 0
+        
+        where_clause, params = queries.search_filter(first_name, last_name, locality,
+                                                     relation_first_name, relation_last_name, match_mode,
+                                                     house_number, duplicates_only)
+        if not where_clause:
+            return pd.DataFrame(), 0
+        
+        pattern = search_pattern(dict(first_name=first_name, last_name=last_name, locality=locality,
+                                      house_number=house_number, relation_first_name=relation_first_name,
+                                      relation_last_name=relation_last_name, duplicates_only=duplicates_only,
+                                      match_mode=match_mode))
+        with get_query_profiler().track(conn, 'search_persons_paginated', pattern) as track:
+            track.set_statement(queries.page_query(where_clause, params), dict(params, limit=limit, offset=offset))
+            total_count = queries.count(where_clause, params)
+            result = queries.search_page(where_clause, params, offset, limit)
+            track.rows_returned, track.matches = len(result), total_count
+        return result, total_count
+        
+    except Exception as e:
+        st.error(f"Search query failed: {e}")
         return pd.DataFrame(), 0
+
+def search_persons_keyset(conn, first_name=None, last_name=None, locality=None,
+                          relation_first_name=None, relation_last_name=None,
+                          limit=20, seek=None, total_count=None, match_mode='contains',
+                          house_number=None, duplicates_only=False):
+    """
+    Search for persons with keyset (seek) pagination
+    
+    Instead of skipping rows with OFFSET, each page seeks from the sort key of
+    a neighbouring page, so deep pages cost the same as the first one.
     
-    where_clause = " AND ".join(conditions)
+    Parameters:
+    - limit: Rows per page
+    - seek: None for the first page, ('from', key) to re-read a page starting at key,
+      ('after', key) / ('before', key) for the page after / before key, or
+      ('last', rows) for the final page holding `rows` records
+    - total_count: Total from an earlier page of the same search; when None it is
+      computed with a window count in the same pass as the page
+    - match_mode: 'prefix', 'contains' or 'phonetic' (see VoterQueries.search_filter)
+    - house_number: House number, compared normalized (see VoterQueries.household)
+    - duplicates_only: Only records in a duplicate cluster found by dedup.py, listed
+      cluster by cluster
     
+    Returns (results, total_count, first_key, last_key); results carry the row key
+    in a ROW_KEY_ALIAS column and are None if the query failed (the error is shown)
+    """
     try:
-        table_check = conn.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{TABLE_NAME}'").fetchone()
-        if not table_check:
+        queries = get_queries(conn)
+        if not queries.catalog.table_exists:
             st.error(f"Table '{TABLE_NAME}' not found in database")
-            return pd.DataFrame(), 0
-        
-        columns = conn.execute(f"PRAGMA table_info({TABLE_NAME})").fetchdf()
-        available_columns = columns['name'].values
+            return pd.DataFrame(), 0, None, None
         
-        desired_columns = ['locality', 'house_number', 'first_name', 'last_name', 
-                          'relation', 'relation_first_name', 'relation_last_name', 'gender']
+        where_clause, params = queries.search_filter(first_name, last_name, locality,
+                                                     relation_first_name, relation_last_name, match_mode,
+                                                     house_number, duplicates_only)
+        if not where_clause:
+            return pd.DataFrame(), 0, None, None
         
-        select_columns = [col for col in desired_columns if col in available_columns]
+        pattern = search_pattern(dict(first_name=first_name, last_name=last_name, locality=locality,
+                                      house_number=house_number, relation_first_name=relation_first_name,
+                                      relation_last_name=relation_last_name, duplicates_only=duplicates_only,
+                                      match_mode=match_mode))
+        with get_query_profiler().track(conn, 'search_persons_keyset', pattern) as track:
+            count_where_clause, count_params = where_clause, params
+            if total_count is None:
+                total_count = queries.summary_count(params)
+            
+            keys = queries.sort_keys(params)
+            key_aliases = [f"_key_{i}" for i in range(len(keys))]
+            key_select = ", ".join(f"{key} AS {alias}" for key, alias in zip(keys, key_aliases))
+            key_row = f"({', '.join(keys)})"
+            
+            mode, value = seek if seek else ('first', None)
+            descending = mode in ('before', 'last')
+            if mode == 'last':
+                limit = value
+            if mode in ('from', 'after', 'before'):
+                operator = {'from': '>=', 'after': '>', 'before': '<'}[mode]
+                bound = ", ".join(f"$seek_{i}" for i in range(len(keys)))
+                where_clause = f"{where_clause} AND {key_row} {operator} ({bound})"
+                params = dict(params, **{f"seek_{i}": v for i, v in enumerate(value)})
+            
+            direction = "DESC" if descending else "ASC"
+            count_select = ", COUNT(*) OVER () AS _total" if total_count is None else ""
+            query = f"""
+            SELECT {queries.catalog.select_clause}, {key_select}{count_select}
+            FROM {TABLE_NAME}
+            WHERE {where_clause}
+            ORDER BY {", ".join(f"{key} {direction}" for key in keys)}
+            LIMIT {limit}
+            """
+            
+            track.set_statement(query, params)
+            result = conn.execute(query, params).fetchdf()
+            if descending:
+                result = result.iloc[::-1].reset_index(drop=True)
+            
+            if total_count is None:
+                if not result.empty:
+                    total_count = int(result['_total'].iloc[0])
+                elif seek:
+                    # The window count only sees rows past the cursor
+                    total_count = queries.count(count_where_clause, count_params)
+                else:
+                    total_count = 0
+                result = result.drop(columns=['_total'])
+            track.rows_returned, track.matches = len(result), total_count
+            
+            # The last sort key is the row key; keep it so a result row can be expanded to its family
+            page = result.drop(columns=key_aliases[:-1]).rename(columns={key_aliases[-1]: ROW_KEY_ALIAS})
+            if result.empty:
+                return page, total_count, None, None
+            
+            def row_key(position):
+                # Plain Python values, so keys can be bound as query parameters later
+                return tuple(v.item() if hasattr(v, 'item') else v for v in result[key_aliases].iloc[position])
+            
+            first_key, last_key = row_key(0), row_key(-1)
+            return page, total_count, first_key, last_key
         
-        if not select_columns:
-            select_columns = list(available_columns)
+    except Exception as e:
+        st.error(f"Search query failed: {e}")
+        return None, total_count, None, None
+
+class SearchSession:
+    """
+    A submitted search and its total match count
+    
+    The database is read-only, so the total is computed once per distinct
+    search and page navigation only fetches the page slice.
+    """
+    
+    def __init__(self, params):
+        self.params = params
+        self.total_count = None
+    
+    def fetch_page(self, conn, limit, seek=None, cache=None):
+        """
+        Fetch one page, returning (results, total_count, first_key, last_key)
         
-        select_clause = ", ".join(select_columns)
+        results is None if the query failed; failed pages are never cached.
+        """
+        if cache is not None:
+            key = search_cache_key(database_fingerprint(DUCKDB_PATH), self.params, limit, seek)
+            cached = cache.get(key)
+            if cached is not None:
+                table, (total_count, first_key, last_key) = cached
+                self.total_count = total_count
+                return table.to_pandas(), total_count, first_key, last_key
         
-        # Get total count
-        count_query = f"SELECT COUNT(*) FROM {TABLE_NAME} WHERE {where_clause}"
-        total_count = conn.execute(count_query, params).fetchone()[0]
+        results, total_count, first_key, last_key = search_persons_keyset(
+            conn,
+            self.params['first_name'],
+            self.params['last_name'],
+            self.params['locality'],
+            self.params['relation_first_name'],
+            self.params['relation_last_name'],
+            limit,
+            seek,
+            self.total_count,
+            self.params.get('match_mode', 'contains'),
+            self.params.get('house_number'),
+            self.params.get('duplicates_only', False)
+        )
+        if results is None:
+            return None, total_count or 0, None, None
+        self.total_count = total_count
+        if cache is not None and total_count is not None:
+            cache.put(key, to_arrow(results), (total_count, first_key, last_key))
+        return results, total_count or 0, first_key, last_key
+
+def export_search_results(conn, params, output_path, file_format='csv'):
+    """Stream every record matching a search to output_path, returning the row count"""
+    try:
+        queries = get_queries(conn)
+        where_clause, query_params = queries.search_filter(
+            params['first_name'],
+            params['last_name'],
+            params['locality'],
+            params['relation_first_name'],
+            params['relation_last_name'],
+            params.get('match_mode', 'contains'),
+            params.get('house_number'),
+            params.get('duplicates_only', False)
+        )
+        if not where_clause:
+            return 0
         
-        # Get paginated results
         query = f"""
-        SELECT {select_clause}
-        FROM {TABLE_NAME} 
+        SELECT {queries.catalog.select_clause}
+        FROM {TABLE_NAME}
         WHERE {where_clause}
-        ORDER BY {select_columns[0] if select_columns else '1'}
-        LIMIT {limit} OFFSET {offset}
+        ORDER BY {", ".join(queries.sort_keys(query_params))}
         """
-        
-        result = conn.execute(query, params).fetchdf()
-        return result, total_count
-        
+        return export_query(conn, query, query_params, output_path, file_format)
     except Exception as e:
-        st.error(f"Search query failed: {e}")
-        return pd.DataFrame(), 0
+        st.error(f"Export failed: {e}")
+        return None
+
+def render_family(conn, results, position):
+    """'Show family' action for the selected result row"""
+    row_id = int(results[ROW_KEY_ALIAS].iloc[position])
+    selected = results.iloc[position]
+    if st.button(f"👪 Show family of {selected.get('first_name', '')} {selected.get('last_name', '')}", key="family_btn"):
+        st.session_state.family_row = row_id
+    
+    if st.session_state.get('family_row') == row_id:
+        family = get_queries(conn).family(row_id)
+        if len(family) <= 1:
+            st.info("No relatives of this voter could be linked.")
+        else:
+            family = family.astype({col: object for col in family.select_dtypes('category').columns}).fillna('')
+            family.columns = [col.replace('_', ' ').title() for col in family.columns]
+            st.dataframe(family, use_container_width=True, hide_index=True)
 
 def create_pagination_controls(total_records, current_page, rows_per_page):
     """Create pagination controls with buttons on left, rows selector on right, info below"""
@@ -286,24 +546,30 @@ def create_pagination_controls(total_records, current_page, rows_per_page):
     with col_left:
         # Navigation buttons
         btn_col1, btn_col2, btn_col3, btn_col4 = st.columns([1, 1, 1, 1])
+        first_key, last_key = st.session_state.page_keys
         with btn_col1:
             if st.button("⏮️", disabled=(current_page == 0), help="First page", key="first_btn"):
                 st.session_state.page_number = 0
+                st.session_state.page_seek = None
                 st.rerun()
         
         with btn_col2:
             if st.button("⬅️", disabled=(current_page == 0), help="Previous page", key="prev_btn"):
                 st.session_state.page_number = max(0, current_page - 1)
+                st.session_state.page_seek = ('before', first_key) if current_page > 1 else None
                 st.rerun()
         
         with btn_col3:
             if st.button("➡️", disabled=(current_page >= total_pages - 1), help="Next page", key="next_btn"):
                 st.session_state.page_number = min(total_pages - 1, current_page + 1)
+                st.session_state.page_seek = ('after', last_key)
                 st.rerun()
         
         with btn_col4:
             if st.button("⏭️", disabled=(current_page >= total_pages - 1), help="Last page", key="last_btn"):
                 st.session_state.page_number = total_pages - 1
+                # Read the final page backwards from the end instead of skipping to it
+                st.session_state.page_seek = ('last', total_records - (total_pages - 1) * rows_per_page)
                 st.rerun()
     
     with col_right:
@@ -317,6 +583,7 @@ def create_pagination_controls(total_records, current_page, rows_per_page):
         if new_rows_per_page != st.session_state.rows_per_page:
             st.session_state.rows_per_page = new_rows_per_page
             st.session_state.page_number = 0  # Reset to first page
+            st.session_state.page_seek = None
             st.rerun()
     
     # Second row: Page information centered
@@ -328,10 +595,7 @@ def create_pagination_controls(total_records, current_page, rows_per_page):
     </div>
     """, unsafe_allow_html=True)
 
-def main():
-    # Initialize database
-    conn = init_database()
-    
+def render_page(pool):
     # Create two columns for left and right panes immediately
     left_pane, right_pane = st.columns([1, 2], gap="medium")
     
@@ -341,7 +605,16 @@ def main():
         st.markdown('<div class="search-header">🔎 Search Criteria</div>', unsafe_allow_html=True)
         
         # Load localities for dropdown
-        localities = load_localities(conn)
+        with db_connection(pool) as conn:
+            localities = load_localities(conn)
+            has_names = get_catalog(conn).has_table(name_table_name(TABLE_NAME))
+            has_duplicates = get_catalog(conn).has_table(duplicates_table_name(TABLE_NAME))
+            has_relations = get_catalog(conn).has_table(relation_table_name(TABLE_NAME))
+        
+        # Live suggestions live outside the form, which only reruns on submit
+        if has_names:
+            with st.expander("✨ Name suggestions"):
+                render_name_suggest(pool)
         
         # Search form - more compact
         with st.form("search_form"):
@@ -349,13 +622,15 @@ def main():
             first_name = st.text_input(
                 "First Name",
                 placeholder="Enter first name...",
-                help="Search by person's first name"
+                help="Search by person's first name",
+                key="first_name_input"
             )
             
             last_name = st.text_input(
                 "Last Name", 
                 placeholder="Enter last name...",
-                help="Search by person's last name"
+                help="Search by person's last name",
+                key="last_name_input"
             )
             
             st.markdown("**📍 Location**")
@@ -366,6 +641,13 @@ def main():
                 help="Select a specific locality"
             )
             
+            house_number = st.text_input(
+                "House Number",
+                placeholder="Enter house number...",
+                help="Everyone registered at this house; pick a locality to look up one household",
+                key="house_number_input"
+            )
+            
             st.markdown("**👥 Relation Information**")
             relation_first_name = st.text_input(
                 "Relation First Name",
@@ -379,11 +661,27 @@ def main():
                 help="Search by relation's last name"
             )
             
+            match_label = st.radio(
+                "Name Matching",
+                options=list(MATCH_MODES),
+                horizontal=True,
+                help="'Starts with' is fastest; 'Contains' matches anywhere in the name; "
+                     "'Sounds like' also finds other spellings (e.g. Sharma / Sarma / Shrma)"
+            )
+            
+            duplicates_only = False
+            if has_duplicates:
+                duplicates_only = st.checkbox(
+                    "Only possible duplicates",
+                    help="Records that look like the same voter registered more than once "
+                         "(found by dedup.py), grouped together"
+                )
+            
             # Search button
             search_clicked = st.form_submit_button("🔍 Search Records", use_container_width=True)
         
         # Search tips
-        st.markdown("💡 **Tips:** Use partial names • Combine filters • Try different spellings")
+        st.markdown("💡 **Tips:** Type the start of a name • Combine filters • Use 'Sounds like' for spelling variants")
         
         st.markdown('</div>', unsafe_allow_html=True)
     
@@ -393,17 +691,22 @@ def main():
         st.markdown('<div class="results-header">📋 Search Results</div>', unsafe_allow_html=True)
         
         # Database stats moved to right pane
-        stats = get_database_stats(conn)
+        with db_connection(pool) as conn:
+            stats = get_database_stats(conn)
         if stats:
-            st.markdown(f'<div class="stats-inline">📊 Total Records: {stats.get("total_records", 0):,} | 🏘️ Localities: {stats.get("unique_localities", 0)}</div>', unsafe_allow_html=True)
+            pool_stats = pool.stats()
+            cache_stats = get_result_cache().stats()
+            st.markdown(f'<div class="stats-inline">📊 Total Records: {stats.get("total_records", 0):,} | 🏘️ Localities: {stats.get("unique_localities", 0)} | 🔌 Connections: {pool_stats["in_use"]}/{pool_stats["size"]} in use, avg wait {pool_stats["avg_wait_ms"]:.1f} ms | ⚡ Cache: {cache_stats["hits"]} hits / {cache_stats["misses"]} misses</div>', unsafe_allow_html=True)
         
         # Handle search
         if search_clicked:
             # Reset pagination when new search is performed
             st.session_state.page_number = 0
+            st.session_state.page_seek = None
             
             # Validate search criteria
-            if not any([first_name, last_name, locality != "All", relation_first_name, relation_last_name]):
+            if not any([first_name, last_name, locality != "All", house_number, relation_first_name, relation_last_name,
+                        duplicates_only]):
                 st.warning("⚠️ Please provide at least one search criterion.")
             else:
                 # Show search summary
@@ -411,8 +714,10 @@ def main():
                 if first_name: search_terms.append(f"First Name: '{first_name}'")
                 if last_name: search_terms.append(f"Last Name: '{last_name}'")
                 if locality != "All": search_terms.append(f"Locality: '{locality}'")
+                if house_number: search_terms.append(f"House Number: '{house_number}'")
                 if relation_first_name: search_terms.append(f"Relation First Name: '{relation_first_name}'")
                 if relation_last_name: search_terms.append(f"Relation Last Name: '{relation_last_name}'")
+                if duplicates_only: search_terms.append("Possible duplicates")
                 
                 st.info(f"🔎 Searching: {' | '.join(search_terms)}")
                 
@@ -424,33 +729,49 @@ def main():
                         'last_name': last_name,
                         'locality': locality,
                         'relation_first_name': relation_first_name,
-                        'relation_last_name': relation_last_name
+                        'relation_last_name': relation_last_name,
+                        'house_number': house_number,
+                        'duplicates_only': duplicates_only,
+                        'match_mode': MATCH_MODES[match_label]
                     }
+                    # Re-submitting the same search keeps its known total
+                    session = st.session_state.get('search_session')
+                    if session is None or session.params != st.session_state.search_params:
+                        st.session_state.search_session = SearchSession(st.session_state.search_params)
         
         # Display results if we have search parameters
         if hasattr(st.session_state, 'search_params'):
-            # Calculate offset for pagination
-            offset = st.session_state.page_number * st.session_state.rows_per_page
-            
-            # Perform paginated search
+            # Perform paginated search, seeking from the cursor of the previous page
             params = st.session_state.search_params
-            results, total_count = search_persons_paginated(
-                conn, 
-                params['first_name'], 
-                params['last_name'], 
-                params['locality'],
-                params['relation_first_name'], 
-                params['relation_last_name'],
-                offset, 
-                st.session_state.rows_per_page
-            )
+            if 'search_session' not in st.session_state:
+                st.session_state.search_session = SearchSession(params)
+            with db_connection(pool) as conn:
+                results, total_count, first_key, last_key = st.session_state.search_session.fetch_page(
+                    conn,
+                    st.session_state.rows_per_page,
+                    st.session_state.page_seek,
+                    get_result_cache()
+                )
+            
+            # Pin the cursor to this page so reruns show the same rows; after a failed
+            # query keep the old cursor, so the next rerun retries the same page
+            if results is not None:
+                st.session_state.page_keys = (first_key, last_key)
+                st.session_state.page_seek = ('from', first_key) if first_key is not None else None
             
-            if results.empty:
+            if params.get('house_number') and params['locality'] != "All":
+                with db_connection(pool) as conn:
+                    members = get_queries(conn).household_size(params['locality'], params['house_number'])
+                st.info(f"🏠 House {params['house_number']}, {params['locality']}: {members} registered members")
+            
+            if results is None:
+                st.caption("The search could not be completed; change a page or search again to retry.")
+            elif results.empty:
                 st.warning("🚫 No records found matching your search criteria.")
                 st.markdown("""
                 **Try:**
                 - Using partial names instead of full names
-                - Checking spelling of names  
+                - Switching name matching to 'Contains' or 'Sounds like'
                 - Removing some filters to broaden the search
                 - Selecting 'All' for locality
                 """)
@@ -464,17 +785,27 @@ def main():
                     st.info(f"🏘️ {unique_localities} localities in current page")
                 
                 # Display results table
-                display_results = results.copy()
+                display_results = results.drop(columns=[ROW_KEY_ALIAS], errors='ignore')
                 display_results.columns = [col.replace('_', ' ').title() for col in display_results.columns]
+                # ENUM columns arrive as pandas Categoricals, which reject the 'N/A' fill value
+                display_results = display_results.astype({col: object for col in display_results.select_dtypes('category').columns})
                 display_results = display_results.fillna('N/A')
                 
-                st.dataframe(
+                show_family = ROW_KEY_ALIAS in results.columns and has_relations
+                event = st.dataframe(
                     display_results,
                     use_container_width=True,
                     hide_index=True,
-                    height=500
+                    height=500,
+                    key="results_table",
+                    on_select="rerun" if show_family else "ignore",
+                    selection_mode="single-row"
                 )
                 
+                if show_family and event.selection.rows:
+                    with db_connection(pool) as conn:
+                        render_family(conn, results, event.selection.rows[0])
+                
                 # Pagination controls with new layout
                 if total_count > st.session_state.rows_per_page:
                     create_pagination_controls(total_count, st.session_state.page_number, st.session_state.rows_per_page)
@@ -491,6 +822,7 @@ def main():
                         if rows_per_page != st.session_state.rows_per_page:
                             st.session_state.rows_per_page = rows_per_page
                             st.session_state.page_number = 0
+                            st.session_state.page_seek = None
                             st.rerun()
                     
                     # Show record count even when no pagination
@@ -500,32 +832,36 @@ def main():
                     </div>
                     """, unsafe_allow_html=True)
                 
-                # Download option
+                # Export option - only runs when requested, streams to a file on disk
                 if total_count > 0:
-                    # Get all results for download (limited to 10000 for performance)
-                    all_results, _ = search_persons_paginated(
-                        conn, 
-                        params['first_name'], 
-                        params['last_name'], 
-                        params['locality'],
-                        params['relation_first_name'], 
-                        params['relation_last_name'],
-                        0, 
-                        min(total_count, 10000)
-                    )
+                    export_col1, export_col2 = st.columns([1, 2])
+                    with export_col1:
+                        export_format = st.selectbox("Export format:", options=list(EXPORT_FORMATS), key="export_format")
+                    with export_col2:
+                        st.markdown("<div style='height: 28px'></div>", unsafe_allow_html=True)
+                        export_clicked = st.button(f"📦 Prepare Export ({total_count:,} records)", use_container_width=True, key="export_btn")
                     
-                    if not all_results.empty:
-                        csv = all_results.to_csv(index=False)
-                        st.download_button(
-                            label=f"📥 Download All Results ({min(total_count, 10000):,} records)",
-                            data=csv,
-                            file_name=f"voter_search_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                            mime="text/csv",
-                            use_container_width=True
-                        )
-                        
-                        if total_count > 10000:
-                            st.info("ℹ️ Download limited to first 10,000 records.")
+                    # The download is offered only in the run that prepared it: the file is read
+                    # into the download once and deleted, so later reruns never reload it
+                    if export_clicked:
+                        remove_old_exports(EXPORT_DIR)
+                        output_path = export_path(EXPORT_DIR, file_format=export_format)
+                        try:
+                            with st.spinner("Exporting records..."), db_connection(pool) as conn:
+                                rows = export_search_results(conn, params, output_path, export_format)
+                            if rows is not None:
+                                with open(output_path, 'rb') as f:
+                                    st.download_button(
+                                        label=f"📥 Download Export ({rows:,} records)",
+                                        data=f,
+                                        file_name=export_file_name(file_format=export_format),
+                                        mime=EXPORT_FORMATS[export_format],
+                                        on_click="ignore",
+                                        use_container_width=True
+                                    )
+                                st.caption("The download is available until you change the page or search.")
+                        finally:
+                            os.remove(output_path)
         
         else:
             # Initial state - show welcome message
@@ -546,5 +882,109 @@ def main():
         unsafe_allow_html=True
     )
 
+def render_dashboard(conn):
+    """Demographics tab, answered from the rollup materialized at ingest"""
+    if not get_catalog(conn).has_table(rollup_table_name(TABLE_NAME)):
+        st.info("Demographics are not available: reload the voter table to build the rollup.")
+        return
+    
+    try:
+        col1, col2 = st.columns(2)
+        with col1:
+            locality = st.selectbox("Locality", ["All"] + load_localities(conn), key="dashboard_locality")
+        locality = None if locality == "All" else locality
+        with col2:
+            areas = polling_areas(conn, locality, TABLE_NAME) if locality else []
+            polling_area = st.selectbox("Polling Area", ["All"] + areas, key="dashboard_polling_area",
+                                        disabled=locality is None)
+        polling_area = None if polling_area == "All" else polling_area
+        
+        ages = age_distribution(conn, locality, polling_area, TABLE_NAME)
+        by_gender = gender_by_age(conn, locality, polling_area, TABLE_NAME)
+        
+        metric_cols = st.columns(4)
+        metric_cols[0].metric("Voters", f"{int(ages['voters'].sum()):,}")
+        gender_totals = by_gender.groupby('gender')['voters'].sum()
+        for col, (gender, label) in zip(metric_cols[1:], [('M', 'Male'), ('F', 'Female'), ('O', 'Other')]):
+            col.metric(label, f"{int(gender_totals.get(gender, 0)):,}")
+        
+        chart_col, table_col = st.columns([2, 1])
+        with chart_col:
+            st.markdown("**Age bands by gender**")
+            st.bar_chart(by_gender, x='age_band', y='voters', color='gender')
+        with table_col:
+            st.markdown("**Age distribution**")
+            st.dataframe(ages, hide_index=True, use_container_width=True)
+        
+        if locality is None:
+            st.markdown("**Voters per locality**")
+            per_locality = locality_breakdown(conn, TABLE_NAME).pivot_table(
+                index='locality', columns='gender', values='voters', aggfunc='sum', fill_value=0
+            )
+            per_locality['Total'] = per_locality.sum(axis=1)
+            st.dataframe(per_locality.sort_values('Total', ascending=False), use_container_width=True)
+    except Exception as e:
+        st.error(f"Failed to load demographics: {e}")
+
+QUERY_LOG_WINDOWS = {"Last hour": pd.Timedelta(hours=1), "Last 24 hours": pd.Timedelta(days=1),
+                     "Last 7 days": pd.Timedelta(days=7), "Everything logged": None}
+
+def render_query_performance():
+    """Admin tab: search timings from the query log, slowest search patterns first"""
+    if not QUERY_LOG_PATH:
+        st.info("Search timing is turned off (VOTER_QUERY_LOG is empty).")
+        return
+    try:
+        log = read_query_log(QUERY_LOG_PATH)
+        window = st.radio("Period", list(QUERY_LOG_WINDOWS), horizontal=True, key="query_log_window")
+        if QUERY_LOG_WINDOWS[window] is not None and not log.empty:
+            log = log[log['timestamp'] >= pd.Timestamp.now() - QUERY_LOG_WINDOWS[window]]
+        
+        if log.empty:
+            st.info(f"No searches logged in this period (log: {QUERY_LOG_PATH}).")
+            return
+        
+        metric_cols = st.columns(4)
+        metric_cols[0].metric("Searches", f"{len(log):,}")
+        metric_cols[1].metric(f"Slower than {SLOW_SEARCH_MS:g} ms" if SLOW_SEARCH_MS is not None else "Profiled",
+                              f"{int(log['slow'].sum()):,}")
+        metric_cols[2].metric("p95", f"{log['wall_ms'].quantile(0.95):.0f} ms")
+        metric_cols[3].metric("Errors", f"{int(log['error'].count()):,}")
+        
+        patterns = slowest_patterns(log)
+        st.markdown("**Search patterns, slowest first**")
+        st.dataframe(patterns, hide_index=True, use_container_width=True)
+        
+        st.markdown("**p95 search time per hour (ms), slowest patterns**")
+        top = log[log['pattern'].isin(patterns['pattern'].head(5))]
+        hourly = top.groupby([pd.Grouper(key='timestamp', freq='h'), 'pattern'])['wall_ms'].quantile(0.95).unstack()
+        st.line_chart(hourly)
+        
+        st.markdown("**Slowest searches**")
+        for _, entry in log.sort_values('wall_ms', ascending=False).head(10).iterrows():
+            scanned = f", {int(entry['rows_scanned']):,} rows scanned" if pd.notna(entry['rows_scanned']) else ""
+            with st.expander(f"{entry['wall_ms']:.0f} ms · {entry['pattern']} · {entry['timestamp']}{scanned}"):
+                if pd.notna(entry['error']):
+                    st.error(entry['error'])
+                if pd.notna(entry['statement']):
+                    st.code(entry['statement'].strip(), language="sql")
+                if pd.notna(entry['plan']):
+                    st.code(entry['plan'], language=None)
+    except Exception as e:
+        st.error(f"Failed to read the query log: {e}")
+
+def main():
+    # Initialize the pool; each query block borrows a cursor only while it runs
+    pool = init_database()
+    tab_names = ["🔍 Search", "📊 Demographics"] + (["⏱️ Query Performance"] if SHOW_QUERY_PANEL else [])
+    tabs = st.tabs(tab_names)
+    with tabs[0]:
+        render_page(pool)
+    with tabs[1], db_connection(pool) as conn:
+        render_dashboard(conn)
+    if SHOW_QUERY_PANEL:
+        with tabs[2]:
+            render_query_performance()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file